@@ -0,0 +1,335 @@
+import multiprocessing as mp
+
+import numpy as np
+
+from cache import CANONICAL_LIMIT, ResultCache, coloring_key, relabel_edges, relabel_vertices
+from cliques import CliqueDetector, bitsets, extend_clique, max_clique
+from coloring import edge_ends, edge_total
+from triangles import TriangleCounter
+
+
+# Clique and triangle analysis runs in a worker process so the GUI never
+# blocks on it. Every edit sends a snapshot of the coloring tagged with an
+# edit counter; at most one job is in flight, newer snapshots replace any
+# that have not been sent yet, and a job that is overtaken by a newer edit
+# aborts at its next checkpoint. A job answers twice: first with the
+# triangle and clique counts, then with a maximum clique per color, which
+# can take much longer on large graphs. Colorings of up to CANONICAL_LIMIT
+# vertices are looked up in the result cache first, so an isomorphic
+# coloring analyzed before (in any session) is not recomputed.
+
+ANALYSIS_VERSION = 2  # Part of the cache key; bumped when results change shape
+MAX_CLIQUE_SECONDS = 0.5  # Per color and search before settling for a lower bound
+
+
+class Cancelled(Exception):
+    pass
+
+
+class AnalysisState:
+    # Worker-side detectors for the last analyzed snapshot. A new snapshot is
+    # diffed against it, so an edge click only costs an incremental update.
+    # A cache hit leaves the detectors alone; they still match `model`.
+    def __init__(self, incremental_limit=256, cache=None, seconds=MAX_CLIQUE_SECONDS):
+        self.incremental_limit = incremental_limit
+        self.cache = ResultCache(None) if cache is None else cache
+        self.seconds = seconds
+        self.model = None
+        self.sizes = None
+        self.cliques = None
+        self.triangles = None
+        self.largest_model = None  # Snapshot `largest` was computed for
+        self.largest = []  # (maximum clique, exact) per color
+        self.adj = []  # Neighbour bitsets per color of `largest_model`
+        self.pending = None  # (cache key, labeling, result) waiting for the cliques
+
+    def analyze(self, model, sizes, interrupt, shown=3):
+        # Triangles and cliques, and on a cache hit the maximum cliques too
+        self.pending = None
+        if model.n > CANONICAL_LIMIT:
+            result = self.compute(model, sizes, interrupt, shown)
+        else:
+            key, perm = coloring_key(model)
+            key = f"analysis:{ANALYSIS_VERSION}:{list(sizes)}:{shown}:{key}"
+            stored = self.cache.get(key)
+            if stored is None:
+                result = self.compute(model, sizes, interrupt, shown)
+                self.pending = (key, perm, dict(result))
+            else:
+                result = relabel(stored, perm, to_canonical=False)
+        result["cache"] = self.cache.counters()
+        return result
+
+    def analyze_largest(self, model, interrupt):
+        # The rest of the result for the snapshot analyze() last computed
+        self.update_largest(model, interrupt)
+        largest = {
+            "max_cliques": [clique for clique, _ in self.largest],
+            "clique_numbers": [len(clique) for clique, _ in self.largest],
+            "exact": [exact for _, exact in self.largest],
+        }
+        if self.pending is not None:
+            key, perm, result = self.pending
+            self.cache.put(key, relabel(dict(result, **largest), perm, to_canonical=True))
+            self.pending = None
+        return largest
+
+    def compute(self, model, sizes, interrupt, shown):
+        if not self.update(model, sizes, interrupt):
+            self.cliques = CliqueDetector(len(model.colors), sizes)
+            self.triangles = TriangleCounter(len(model.colors))
+            self.cliques.interrupt = interrupt
+            self.cliques.sync(model)
+            self.triangles.sync(model)
+        self.model = model
+        self.sizes = list(sizes)
+        cliques = self.cliques
+        colors = range(len(model.colors))
+        return {
+            "n": model.n,
+            "overflow": cliques.overflow,
+            "limit": cliques.limit,
+            "counts": [cliques.count(c) for c in colors],
+            "examples": [cliques.clique_vertices(c, shown) for c in colors],
+            "glow": cliques.clique_edge_ids(),
+            "totals": self.triangles.totals.copy(),
+            "per_vertex": self.triangles.vertex_counts(),
+        }
+
+    def update(self, model, sizes, interrupt):
+        # Patch the detectors from the previous snapshot; False if a full
+        # rebuild is needed instead
+        if list(sizes) != self.sizes:
+            return False
+        old = self.model
+        changed = changed_edges(old, model, self.incremental_limit)
+        if changed is None:
+            return False
+        for _ in range(old.n, model.n):
+            self.cliques.add_vertex()
+            self.triangles.add_vertex()
+        for k in changed:
+            interrupt()
+            u, v = edge_ends(int(k))
+            color = int(model.color[k]) if model.present[k] else None
+            self.cliques.set_edge(u, v, color)
+            self.triangles.set_edge(u, v, color)
+        return True
+
+    def update_largest(self, model, interrupt):
+        # One maximum clique per color. After a few edits a larger clique has
+        # to use an edge that gained the color, so only the common
+        # neighbourhoods of those edges are searched; the whole graph is only
+        # searched again when an edge of the current maximum clique lost its
+        # color (seeded with what is left of that clique). A search that ran
+        # out of time leaves a lower bound; searching again after every edit
+        # would spend the whole time limit each time, so from then on edits
+        # only grow the bound greedily.
+        old = self.largest_model
+        changed = changed_edges(old, model, self.incremental_limit)
+        everyone = (1 << model.n) - 1
+        if changed is None:
+            adjs = [bitsets(A) for A in model.adjacencies()]
+        else:
+            adjs = patch_bitsets(self.adj, old, model, changed)
+        largest = []
+        for color, adj in enumerate(adjs):
+            if changed is None:
+                hint = self.largest[color][0] if color < len(self.largest) else ()
+                largest.append(max_clique(adj, everyone, hint, interrupt, self.seconds))
+                continue
+            clique, exact = self.largest[color]
+            members = set(clique)
+            gained = []
+            broken = set()  # One end of every edge of `clique` that lost the color
+            for k in changed.tolist():
+                u, v = edge_ends(k)
+                before = k < old.present.size and old.present[k] and old.color[k] == color
+                after = model.present[k] and model.color[k] == color
+                if after and not before:
+                    gained.append((u, v))
+                elif before and not after and u in members and v in members:
+                    broken.add(v)
+            if broken:
+                hint = [w for w in clique if w not in broken]
+                if exact:
+                    largest.append(max_clique(adj, everyone, hint, interrupt, self.seconds))
+                    continue
+                clique = extend_clique(adj, hint, everyone)
+            for u, v in gained:
+                if exact:
+                    inner, inner_exact = max_clique(adj, adj[u] & adj[v], (), interrupt,
+                                                    self.seconds)
+                    exact = inner_exact
+                    inner += [u, v]
+                else:
+                    inner = extend_clique(adj, [u, v], everyone)
+                if len(inner) > len(clique):
+                    clique = sorted(inner)
+            largest.append((clique, exact))
+        self.largest = largest
+        self.largest_model = model
+        self.adj = adjs
+
+
+def patch_bitsets(adjs, old, model, changed):
+    # Per-color neighbour bitsets of `old` brought up to `model` by redoing
+    # only the changed edges. The lists are copied, so an interrupted update
+    # leaves the stored bitsets matching `old`.
+    adjs = [rows + [0] * (model.n - old.n) for rows in adjs]
+    for k in changed.tolist():
+        u, v = edge_ends(k)
+        for rows in adjs:
+            rows[u] &= ~(1 << v)
+            rows[v] &= ~(1 << u)
+        if model.present[k]:
+            rows = adjs[model.color[k]]
+            rows[u] |= 1 << v
+            rows[v] |= 1 << u
+    return adjs
+
+
+def changed_edges(old, model, limit):
+    # Edge ids whose color or presence differs between two snapshots (edges
+    # of new vertices count as changed if present), or None when there are
+    # more than `limit` or `model` is not an extension of `old`
+    if old is None or model.n < old.n or len(model.colors) != len(old.colors):
+        return None
+    m = edge_total(old.n)
+    present = model.present[:m]
+    changed = np.flatnonzero((present != old.present) |
+                             ((present == 1) & (model.color[:m] != old.color)))
+    added = m + np.flatnonzero(model.present[m:])
+    changed = np.concatenate([changed, added])
+    if changed.size > limit:
+        return None
+    return changed
+
+
+def relabel(result, perm, to_canonical):
+    # Copy of an analysis result with its vertex data moved between vertex
+    # labels and canonical positions; perm[i] is the vertex at position i
+    result = dict(result)
+    if perm is None:
+        return result
+    perm = np.asarray(perm)
+    position = np.empty_like(perm)
+    position[perm] = np.arange(len(perm))
+    mapping = position if to_canonical else perm
+    result["examples"] = [sorted(tuple(sorted(mapping[list(c)].tolist())) for c in cliques)
+                          for cliques in result["examples"]]
+    result["glow"] = relabel_edges(result["glow"], mapping)
+    result["max_cliques"] = [sorted(mapping[clique].tolist()) for clique in result["max_cliques"]]
+    result["per_vertex"] = relabel_vertices(result["per_vertex"], perm, inverse=not to_canonical)
+    return result
+
+
+def run_worker(conn, latest):
+    # Worker loop: one (version, snapshot, sizes) job at a time, replying
+    # with (version, result, final) messages: the counts, then the maximum
+    # cliques (final); None in place of a result if the job was overtaken
+    state = AnalysisState(cache=ResultCache.from_env())
+    while True:
+        try:
+            job = conn.recv()
+        except EOFError:  # The GUI process is gone
+            return
+        if job is None:
+            return
+        version, model, sizes = job
+
+        def interrupt():
+            if latest.value != version:
+                raise Cancelled()
+
+        try:
+            result = state.analyze(model, sizes, interrupt)
+        except Cancelled:
+            # The detectors are half updated, so start over next time
+            state.model = None
+            conn.send((version, None, True))
+            continue
+        if "max_cliques" in result:  # Cache hit
+            conn.send((version, result, True))
+            continue
+        conn.send((version, result, False))
+        try:
+            conn.send((version, state.analyze_largest(model, interrupt), True))
+        except Cancelled:
+            conn.send((version, None, True))
+
+
+class AnalysisWorker:
+    # GUI side of the pipeline. submit() is called on every edit and poll()
+    # from a canvas timer; `result` always holds the newest analysis and
+    # `fresh()` tells whether it matches the latest edit. Its maximum
+    # cliques are merged in when they arrive; until then it has no
+    # "max_cliques".
+    def __init__(self):
+        self.version = 0
+        self.latest = mp.Value('q', 0, lock=False)  # Single writer, so no lock
+        self.conn, child = mp.Pipe()
+        self.process = mp.Process(target=run_worker, args=(child, self.latest), daemon=True)
+        self.process.start()
+        self.in_flight = False
+        self.queued = None    # Newest job not yet sent
+        self.result = None    # (version, result)
+
+    def submit(self, model, sizes):
+        self.version += 1
+        self.latest.value = self.version  # Lets an in-flight job abort early
+        self.queued = (self.version, model.copy(), list(sizes))
+        self.send()
+        return self.version
+
+    def send(self):
+        # Only one job in flight, so the pipe never fills up with stale work
+        if self.in_flight or self.queued is None:
+            return
+        self.conn.send(self.queued)
+        self.queued = None
+        self.in_flight = True
+
+    def poll(self):
+        # Collect finished jobs; True if a result for the latest edit arrived
+        arrived = False
+        while self.conn.poll():
+            version, result, final = self.conn.recv()
+            if final:
+                self.in_flight = False
+            if result is None:
+                continue
+            if self.result is not None and version == self.result[0]:
+                self.result[1].update(result)
+            elif self.result is None or version > self.result[0]:
+                self.result = (version, result)
+            else:
+                continue
+            arrived = arrived or version == self.version
+        self.send()
+        return arrived
+
+    def busy(self):
+        return self.in_flight or self.queued is not None
+
+    def fresh(self):
+        return self.result is not None and self.result[0] == self.version
+
+    def complete(self):
+        return self.fresh() and "max_cliques" in self.result[1]
+
+    def wait(self, timeout=None, largest=True):
+        # Block until the latest edit is analyzed, with its maximum cliques
+        # unless `largest` is False (used headless)
+        while not (self.complete() if largest else self.fresh()):
+            if not self.conn.poll(timeout):
+                return False
+            self.poll()
+        return True
+
+    def close(self):
+        if self.in_flight:
+            self.process.terminate()
+        elif self.process.is_alive():
+            self.conn.send(None)
+        self.process.join(timeout=1)
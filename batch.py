@@ -0,0 +1,99 @@
+import json
+import sys
+import time
+
+import numpy as np
+
+from cache import witness_key
+from coloring import batch_adjacency, edge_total
+from cliques import bitsets, has_clique
+from storage import ArchiveWriter
+
+REPLAY_LIMIT = 10000  # Seeded runs with more witnesses are not cached
+
+
+def avoids(red, blue, n, sizes):
+    # True if the coloring has no red K_s and no blue K_t
+    everyone = (1 << n) - 1
+    return not (has_clique(red, everyone, sizes[0]) or has_clique(blue, everyone, sizes[1]))
+
+
+def run_batch(n, sizes, samples, out=sys.stdout, seed=None, chunk=1000, report_every=100000,
+              cache=None, archive=None):
+    # Sample uniformly random 2-colorings of K_n and stream JSONL records:
+    # one per coloring with no red K_s and no blue K_t, periodic progress
+    # records, and a final summary. A seeded run always produces the same
+    # records, so with a result cache a repeated run is replayed from it.
+    # With `archive`, witnesses are also appended to that binary archive,
+    # labeled by sample index.
+    writer = None if archive is None else ArchiveWriter(archive, n)
+    try:
+        return sample_batch(n, sizes, samples, out, seed, chunk, report_every, cache, writer)
+    finally:
+        if writer is not None:
+            writer.close()
+
+
+def sample_batch(n, sizes, samples, out, seed, chunk, report_every, cache, writer):
+    run_key = f"batch:{n}:{sizes[0]},{sizes[1]}:{samples}:{seed}:{chunk}"
+    if cache is not None and seed is not None:
+        records = cache.get(run_key)
+        if records is not None:
+            for record in records:
+                out.write(json.dumps(dict(record, cached=True)) + "\n")
+                if writer is not None and record["type"] == "witness":
+                    writer.append([int(c) for c in record["coloring"]], label=record["sample"])
+            out.flush()
+            if writer is not None:
+                writer.flush()
+            return records[-1]["avoiding"]
+    rng = np.random.default_rng(seed)
+    m = edge_total(n)
+    start = time.perf_counter()
+    done = 0
+    found = 0
+    kept = []  # Witness and summary records, for the cache
+
+    def emit(record):
+        out.write(json.dumps(record) + "\n")
+        out.flush()
+        if record["type"] != "progress" and kept is not None:
+            kept.append(record)
+
+    def progress(kind):
+        elapsed = time.perf_counter() - start
+        emit({"type": kind, "n": n, "s": sizes[0], "t": sizes[1], "samples": done,
+              "avoiding": found, "elapsed": round(elapsed, 3),
+              "rate": round(done / elapsed, 1) if elapsed > 0 else None})
+
+    while done < samples:
+        size = min(chunk, samples - done)
+        colorings = rng.integers(0, 2, size=(size, m), dtype=np.uint8)
+        # Adjacency matrices for the whole chunk at once
+        red = batch_adjacency(n, colorings == 0)
+        blue = batch_adjacency(n, colorings == 1)
+        for k in range(size):
+            if avoids(bitsets(red[k]), bitsets(blue[k]), n, sizes):
+                found += 1
+                if found == 1 and cache is not None:
+                    # Lets the GUI's Search button show it right away
+                    cache.put(witness_key("witness", n, sizes),
+                              {"coloring": colorings[k].copy(), "connection_set": None})
+                if found > REPLAY_LIMIT:
+                    kept = None
+                if writer is not None:
+                    writer.append(colorings[k], label=done + k)
+                emit({"type": "witness", "n": n, "s": sizes[0], "t": sizes[1],
+                      "sample": done + k,
+                      "coloring": "".join(map(str, colorings[k].tolist()))})
+        if writer is not None:
+            # An interrupted run still leaves every finished chunk on disk
+            writer.flush()
+        before = done
+        done += size
+        if done // report_every != before // report_every:
+            progress("progress")
+    progress("summary")
+    if cache is not None and seed is not None and kept is not None:
+        cache.put(run_key, kept)
+    return found
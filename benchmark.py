@@ -0,0 +1,187 @@
+import json
+import multiprocessing as mp
+import os
+import platform
+import queue
+import statistics
+import sys
+import time
+
+import numpy as np
+
+DEFAULT_SIZES = (5, 10, 20, 50, 100, 200, 500, 1000)
+CASES = ('create_graph', 'draw_graph', 'pick_edge', 'analysis', 'max_clique', 'drag', 'add_vertex')
+
+
+# Every size runs in its own process on the Agg backend, so a size that is
+# too slow can be stopped by the timeout without losing the others, and
+# matplotlib state never leaks between sizes. Interactions are dispatched as
+# synthetic MouseEvent/KeyEvent objects through the canvas callbacks, the
+# same path a real backend uses.
+
+
+def timed(fn, repeat):
+    fn()  # Warm-up, so one-off costs (caches, first-time imports) are not counted
+    runs = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        runs.append(time.perf_counter() - start)
+    return {"median": statistics.median(runs), "min": min(runs), "runs": repeat}
+
+
+def bench_size(n, repeat, results):
+    # Cached analysis results would make the timings meaningless
+    os.environ['RAMSEY_CACHE'] = 'off'
+    import matplotlib
+    matplotlib.use('Agg')
+    from matplotlib.backend_bases import KeyEvent, MouseEvent
+    from coloring import edge_ends
+    from visualizer import GraphVisualizer
+
+    rng = np.random.default_rng(0)
+    vis = GraphVisualizer()
+    canvas = vis.fig.canvas
+    canvas.draw()
+
+    def pixel(xy):
+        return vis.ax.transData.transform(xy)
+
+    def mouse(name, xy, button=1):
+        x, y = pixel(xy)
+        canvas.callbacks.process(name, MouseEvent(name, canvas, x, y, button=button))
+
+    def key(name, k):
+        canvas.callbacks.process(name, KeyEvent(name, canvas, k))
+
+    # Each size in DEFAULT_SIZES (5 to 1000 vertices) is set directly rather
+    # than through the slider, so building and drawing are timed separately
+    vis.num_vertices = n
+    results.put((n, 'create_graph', timed(vis.create_graph, repeat)))
+    results.put((n, 'draw_graph', timed(vis.draw_graph, repeat)))
+    canvas.draw()  # Capture the blit background
+
+    def click_edge():
+        k = int(rng.integers(vis.coloring.num_edges()))
+        u, v = edge_ends(k)
+        mid = (np.add(vis.pos[u], vis.pos[v]) / 2).tolist()
+        mouse('button_press_event', mid)
+        mouse('button_release_event', mid)
+    results.put((n, 'pick_edge', timed(click_edge, repeat)))
+
+    # Edge click until the worker's counts for it are back, and until its
+    # maximum cliques are too
+    def analyze_edit():
+        click_edge()
+        vis.analysis.wait(largest=False)
+        vis.update_analysis()
+    results.put((n, 'analysis', timed(analyze_edit, repeat)))
+
+    def largest_edit():
+        click_edge()
+        vis.analysis.wait()
+        vis.update_analysis()
+    results.put((n, 'max_clique', timed(largest_edit, repeat)))
+
+    # Several motion events per frame, as a fast mouse would deliver them
+    key('key_press_event', 'alt')
+    mouse('button_press_event', vis.pos[0])
+    step = [0]
+
+    def drag_frame():
+        step[0] += 1
+        for j in range(4):
+            angle = step[0] / 10 + j / 40
+            mouse('motion_notify_event', (0.6 * np.cos(angle), 0.6 * np.sin(angle)))
+        vis.frames.frame()
+    results.put((n, 'drag', timed(drag_frame, repeat)))
+    mouse('button_release_event', vis.pos[0])
+    key('key_release_event', 'alt')
+
+    def add_vertex():
+        key('key_press_event', 'a')
+        mouse('button_press_event', rng.uniform(-1, 1, size=2).tolist())
+        mouse('button_release_event', (0, 0))
+        key('key_release_event', 'a')
+    results.put((n, 'add_vertex', timed(add_vertex, repeat)))
+    vis.analysis.close()
+
+
+def run_benchmarks(sizes=DEFAULT_SIZES, repeat=5, timeout=120.0, log=sys.stderr):
+    # Returns {n: {case: timing or {"status": "timeout"/"error"}}}
+    ctx = mp.get_context('spawn')
+    report = {}
+    for n in sizes:
+        results = ctx.Queue()
+        # Not a daemon: the visualizer starts its own analysis process
+        worker = ctx.Process(target=bench_size, args=(n, repeat, results))
+        deadline = time.perf_counter() + timeout
+        worker.start()
+        cases = {}
+        while len(cases) < len(CASES):
+            try:
+                _, case, timing = results.get(timeout=max(0.0, min(0.5, deadline - time.perf_counter())))
+                cases[case] = timing
+                log.write(f"n={n} {case}: {timing['median'] * 1000:.2f} ms\n")
+                continue
+            except queue.Empty:
+                pass
+            if not worker.is_alive() or time.perf_counter() >= deadline:
+                break
+        status = "error" if not worker.is_alive() and worker.exitcode else "timeout"
+        if worker.is_alive():
+            worker.terminate()
+        worker.join()
+        for case in CASES:
+            if case not in cases:
+                cases[case] = {"status": status}
+                log.write(f"n={n} {case}: {status}\n")
+        report[str(n)] = cases
+    return report
+
+
+def write_report(report, path, repeat):
+    import matplotlib
+    document = {
+        "meta": {
+            "created": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "python": platform.python_version(),
+            "matplotlib": matplotlib.__version__,
+            "numpy": np.__version__,
+            "platform": platform.platform(),
+            "repeat": repeat,
+        },
+        "results": report,
+    }
+    with open(path, 'w') as f:
+        json.dump(document, f, indent=2)
+
+
+def compare(report, baseline_path, tolerance=0.2, out=sys.stdout):
+    # Median time ratios against a stored report; returns the regressions
+    with open(baseline_path) as f:
+        baseline = json.load(f)["results"]
+    regressions = []
+    out.write(f"{'n':>6} {'case':<14} {'baseline':>11} {'current':>11} {'ratio':>7}\n")
+    for n, cases in report.items():
+        for case, timing in cases.items():
+            before = baseline.get(n, {}).get(case, {})
+            if "median" in before and "median" not in timing:
+                # Finished before but not any more
+                regressions.append((n, case, float('inf')))
+                out.write(f"{n:>6} {case:<14} {before['median'] * 1000:>9.2f}ms "
+                          f"{timing['status']:>11}\n")
+                continue
+            if "median" not in before or "median" not in timing:
+                continue
+            ratio = timing["median"] / before["median"]
+            if ratio > 1 + tolerance:
+                verdict = "slower"
+                regressions.append((n, case, ratio))
+            elif ratio < 1 - tolerance:
+                verdict = "faster"
+            else:
+                verdict = ""
+            out.write(f"{n:>6} {case:<14} {before['median'] * 1000:>9.2f}ms "
+                      f"{timing['median'] * 1000:>9.2f}ms {ratio:>6.2f}x {verdict}\n")
+    return regressions
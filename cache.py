@@ -0,0 +1,161 @@
+import hashlib
+import os
+import pickle
+import sqlite3
+import time
+from collections import OrderedDict
+
+import numpy as np
+
+from coloring import edge_ends_array, edge_ids
+from enumeration import Budget, canonical_form
+
+CANONICAL_LIMIT = 64  # Larger colorings are keyed by their labeled arrays
+
+
+# Results are keyed by a canonical form of the coloring, so a relabeled
+# (isomorphic) coloring finds the entry of the original. A coloring with
+# absent edges is a complete graph whose vertex pairs carry one of k colors
+# or "absent"; it is canonized like enumeration.canonical_form does graphs,
+# with refinement counting neighbours in every color at once. Vertex data
+# (per-vertex values, clique vertex lists, edge ids) is stored in canonical
+# labels and mapped back through the labeling on the way out.
+
+
+def color_bitsets(model):
+    # Neighbour bitsets per color, absent edges in none of them
+    n = model.n
+    adjs = [[0] * n for _ in model.colors]
+    ids = np.flatnonzero(model.present)
+    u, v = edge_ends_array(ids)
+    for color, a, b in zip(model.color[ids].tolist(), u.tolist(), v.tolist()):
+        adjs[color][a] |= 1 << b
+        adjs[color][b] |= 1 << a
+    return adjs
+
+
+def coloring_key(model):
+    # (key, labeling): labeling[i] is the vertex at canonical position i, or
+    # None if the key is for this exact labeling (large or highly symmetric)
+    n = model.n
+    if n <= CANONICAL_LIMIT:
+        try:
+            cert, perm = canonical_form(color_bitsets(model), n, budget=2000)
+            text = f"{n}:{len(model.colors)}:" + ",".join(map(str, cert))
+            return "canon:" + hashlib.blake2b(text.encode(), digest_size=20).hexdigest(), perm
+        except Budget:
+            pass
+    digest = hashlib.blake2b(f"{n}:{len(model.colors)}:".encode(), digest_size=20)
+    digest.update(model.present.tobytes())
+    digest.update((model.color * model.present).tobytes())
+    return "labeled:" + digest.hexdigest(), None
+
+
+def witness_key(kind, n, sizes):
+    # Search results are keyed by what was searched for: "witness" holds any
+    # coloring of K_n with no K_{sizes[c]} in any color c, "circulant" the
+    # outcome of the exhaustive circulant search
+    return f"{kind}:{n}:" + ",".join(map(str, sizes))
+
+
+def relabel_vertices(values, perm, inverse=False):
+    # Per-vertex array from vertex order to canonical order, or back
+    if perm is None:
+        return np.array(values)
+    out = np.empty_like(values)
+    if inverse:
+        out[perm] = values
+    else:
+        out[:] = np.asarray(values)[perm]
+    return out
+
+
+def relabel_edges(ids, mapping):
+    # Edge ids with both endpoints sent through `mapping` (an index array)
+    u, v = edge_ends_array(ids)
+    return np.sort(edge_ids(mapping[u], mapping[v]))
+
+
+class ResultCache:
+    # Two tiers: an LRU dict of recent entries in memory, in front of a
+    # SQLite table on disk that outlives the session. Disk entries carry
+    # their size and last use; once the table grows past `max_bytes` the
+    # least recently used entries are evicted. Values are pickled.
+    def __init__(self, path=None, capacity=256, max_bytes=64 << 20):
+        self.path = path
+        self.capacity = capacity
+        self.max_bytes = max_bytes
+        self.memory = OrderedDict()
+        self.db = None
+        self.hits = 0
+        self.misses = 0
+
+    @classmethod
+    def from_env(cls):
+        # RAMSEY_CACHE names the database file; "off" keeps the cache in memory
+        path = os.environ.get('RAMSEY_CACHE', os.path.join(
+            os.path.expanduser('~'), '.cache', 'ramsey', 'results.sqlite'))
+        return cls(None if path == 'off' else path)
+
+    def connect(self):
+        # Opened lazily, so a cache created before a fork is not shared
+        if self.db is None and self.path is not None:
+            os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+            self.db = sqlite3.connect(self.path, timeout=5.0)
+            self.db.execute("CREATE TABLE IF NOT EXISTS results (key TEXT PRIMARY KEY, "
+                            "value BLOB NOT NULL, size INTEGER NOT NULL, used REAL NOT NULL)")
+            self.db.commit()
+        return self.db
+
+    def get(self, key, default=None):
+        if key in self.memory:
+            self.memory.move_to_end(key)
+            self.hits += 1
+            return self.memory[key]
+        db = self.connect()
+        row = None
+        if db is not None:
+            row = db.execute("SELECT value FROM results WHERE key = ?", (key,)).fetchone()
+        if row is None:
+            self.misses += 1
+            return default
+        db.execute("UPDATE results SET used = ? WHERE key = ?", (time.time(), key))
+        db.commit()
+        self.hits += 1
+        value = pickle.loads(row[0])
+        self.remember(key, value)
+        return value
+
+    def put(self, key, value):
+        self.remember(key, value)
+        db = self.connect()
+        if db is None:
+            return
+        blob = pickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL)
+        db.execute("INSERT OR REPLACE INTO results VALUES (?, ?, ?, ?)",
+                   (key, blob, len(blob), time.time()))
+        self.evict()
+        db.commit()
+
+    def remember(self, key, value):
+        self.memory[key] = value
+        self.memory.move_to_end(key)
+        if len(self.memory) > self.capacity:
+            self.memory.popitem(last=False)
+
+    def evict(self):
+        total = self.db.execute("SELECT COALESCE(SUM(size), 0) FROM results").fetchone()[0]
+        if total <= self.max_bytes:
+            return
+        # Walk entries oldest first until enough bytes are freed
+        excess = total - self.max_bytes
+        stale = []
+        for key, size in self.db.execute("SELECT key, size FROM results ORDER BY used"):
+            stale.append((key,))
+            excess -= size
+            if excess <= 0:
+                break
+        self.db.executemany("DELETE FROM results WHERE key = ?", stale)
+
+    def counters(self):
+        return {"hits": self.hits, "misses": self.misses}
@@ -0,0 +1,421 @@
+import heapq
+import time
+from itertools import combinations
+
+import numpy as np
+
+from coloring import edge_id
+
+
+def count_cliques(adj, candidates, k):
+    # Number of k-cliques inside the `candidates` bitset of graph `adj`
+    if k <= 0:
+        return 1
+    if k == 1:
+        return candidates.bit_count()
+    total = 0
+    while candidates and candidates.bit_count() >= k:
+        low = candidates & -candidates
+        w = low.bit_length() - 1
+        candidates ^= low
+        total += count_cliques(adj, candidates & adj[w], k - 1)
+    return total
+
+
+def has_clique(adj, candidates, k):
+    # Whether the `candidates` bitset contains a k-clique; stops at the first one
+    if k <= 0:
+        return True
+    if k == 1:
+        return candidates != 0
+    while candidates and candidates.bit_count() >= k:
+        low = candidates & -candidates
+        w = low.bit_length() - 1
+        candidates ^= low
+        if has_clique(adj, candidates & adj[w], k - 1):
+            return True
+    return False
+
+
+def clique_number(adj, candidates, size=0, best=0):
+    # Size of the largest clique inside the `candidates` bitset
+    while candidates:
+        if size + candidates.bit_count() <= best:
+            return best
+        low = candidates & -candidates
+        w = low.bit_length() - 1
+        candidates ^= low
+        best = clique_number(adj, candidates & adj[w], size + 1, best)
+    return max(best, size)
+
+
+def max_clique(adj, candidates, hint=(), interrupt=None, seconds=None, chunk=4096):
+    # (clique, exact): a largest clique inside the `candidates` bitset as a
+    # sorted vertex list. Branch and bound in the style of Tomita's MCQ over
+    # bitsets (San Segundo's BBMC): vertices are renumbered by decreasing
+    # degree, and each node (a clique C and the candidates P extending it)
+    # greedily splits P into color classes, lowest vertex first. A clique
+    # takes at most one vertex per class, so the vertex colored c can at
+    # best complete a clique of |C| + c, and only vertices whose bound beats
+    # the incumbent become children; a child gets the neighbours of its
+    # vertex among the vertices colored before it.
+    #
+    # Like has_clique_batch, nodes are expanded in lockstep from a worklist,
+    # here with bitsets of any width as columns of uint64 words: every
+    # round each node in a chunk colors its next vertex. The worklist is
+    # last in, first out, and the highest colors are emitted last, so the
+    # search stays close to MCQ's depth-first order.
+    #
+    # `hint` is a clique from an earlier, similar graph; if it is still a
+    # clique it seeds the incumbent. Once `seconds` have passed the search
+    # stops before its next chunk with the best clique so far and exact False.
+    # `interrupt` is polled once per chunk and may raise to abort.
+    vertices = []
+    rest = candidates
+    while rest:
+        low = rest & -rest
+        vertices.append(low.bit_length() - 1)
+        rest ^= low
+    if len(vertices) <= 1:
+        return vertices, True
+    A = unpack_bitsets([adj[v] & candidates for v in vertices], vertices)
+    order = np.argsort(-A.sum(axis=1), kind='stable')
+    A = A[np.ix_(order, order)]
+    label = np.asarray(vertices)[order]
+    position = {v: i for i, v in enumerate(label.tolist())}
+    m = len(label)
+    rows = word_columns(A)
+    # Everything but the neighbours and the vertex itself
+    outside = word_columns(~A & ~np.eye(m, dtype=bool))
+
+    # Incumbent: the hint if it is still a clique, or a greedy clique taken
+    # in degree order if that is larger
+    best = []
+    if hint and all(v in position for v in hint):
+        clique = [position[v] for v in hint]
+        if A[np.ix_(clique, clique)].sum() == len(clique) * (len(clique) - 1):
+            best = clique
+    room = np.ones(m, dtype=bool)
+    greedy = []
+    while room.any():
+        v = int(np.argmax(room))
+        greedy.append(v)
+        room &= A[v]
+    if len(greedy) > len(best):
+        best = greedy
+    best_size = len(best)
+    best_words = word_columns(np.isin(np.arange(m), best)[:, None])[:, 0]
+
+    # Worklist chunks of (candidates, clique, clique size, bound)
+    everyone = word_columns(np.ones((m, 1), dtype=bool))
+    work = [(everyone, np.zeros_like(everyone), np.zeros(1, dtype=np.int64),
+             np.full(1, m + 1, dtype=np.int64))]
+    deadline = None if seconds is None else time.perf_counter() + seconds
+    exact = True
+    while work:
+        P, C, size, bound = work.pop()
+        if len(size) > chunk:
+            work.append((P[:, :-chunk], C[:, :-chunk], size[:-chunk], bound[:-chunk]))
+            P, C, size, bound = P[:, -chunk:], C[:, -chunk:], size[-chunk:], bound[-chunk:]
+        keep = bound > best_size
+        if not keep.any():
+            continue
+        P, C, size = P[:, keep], C[:, keep], size[keep]
+        if interrupt is not None:
+            interrupt()
+        if deadline is not None and time.perf_counter() > deadline:
+            exact = False
+            break
+        P, C, size, bound = color_children(P, C, size, best_size - size, rows, outside)
+        if len(size) and size.max() > best_size:
+            top = int(np.argmax(size))
+            best_size, best_words = int(size[top]), C[:, top].copy()
+        # Leaves (no candidates left) only mattered for the incumbent
+        keep = (bound > best_size) & np.logical_or.reduce(P != 0, axis=0)
+        if keep.any():
+            work.append((P[:, keep], C[:, keep], size[keep], bound[keep]))
+    bits = np.unpackbits(best_words.view(np.uint8), bitorder='little', count=m)
+    return sorted(label[bits.astype(bool)].tolist()), exact
+
+
+def extend_clique(adj, clique, candidates):
+    # Grow a clique greedily inside the `candidates` bitset, each time by the
+    # vertex with the most neighbours among those that could still join;
+    # a cheap lower bound where max_clique would be too slow
+    room = candidates
+    for v in clique:
+        room &= adj[v]
+    clique = list(clique)
+    while room:
+        best, most = 0, -1
+        rest = room
+        while rest:
+            low = rest & -rest
+            v = low.bit_length() - 1
+            rest ^= low
+            count = (adj[v] & room).bit_count()
+            if count > most:
+                best, most = v, count
+        clique.append(best)
+        room &= adj[best]
+    return sorted(clique)
+
+
+def color_children(P, C, size, threshold, rows, outside):
+    # One lockstep greedy coloring of every node (column) in a chunk;
+    # returns the children (candidates, clique, size, bound) of the
+    # vertices colored above each node's threshold, in coloring order
+    words = len(P)
+    node = np.arange(P.shape[1])
+    uncolored = P.copy()
+    Q = P.copy()
+    color = np.ones(len(node), dtype=np.int64)
+    one = np.uint64(1)
+    found = []
+    while True:
+        nonzero = Q != 0
+        busy = np.logical_or.reduce(nonzero, axis=0)
+        if not busy.all():
+            # A node whose current class is full starts the next one
+            full = np.flatnonzero(~busy)
+            color[full] += 1
+            Q[:, full] = uncolored[:, full]
+            busy[full] = np.logical_or.reduce(Q[:, full] != 0, axis=0)
+            if not busy.all():
+                node, uncolored, Q, color, threshold = (
+                    node[busy], uncolored[:, busy], Q[:, busy], color[busy], threshold[busy])
+                if not len(node):
+                    break
+            nonzero = Q != 0
+        # Lowest vertex of each current class
+        word = np.full(len(node), words - 1)
+        for w in range(words - 2, -1, -1):
+            word = np.where(nonzero[w], w, word)
+        at = np.arange(len(node))
+        q = Q[word, at]
+        low = q & (~q + one)
+        v = word * 64 + np.bitwise_count(low - one).astype(np.int64)
+        Q &= np.take(outside, v, axis=1)
+        uncolored[word, at] ^= low
+        emit = np.flatnonzero(color > threshold)
+        if len(emit):
+            parent = node[emit]
+            child = np.take(rows, v[emit], axis=1) & np.take(P, parent, axis=1)
+            child &= ~uncolored[:, emit]
+            clique = np.take(C, parent, axis=1)
+            clique[word[emit], np.arange(len(emit))] |= low[emit]
+            found.append((child, clique, size[parent] + 1, size[parent] + color[emit]))
+    if not found:
+        empty = np.zeros((words, 0), dtype=np.uint64)
+        return empty, empty, np.zeros(0, np.int64), np.zeros(0, np.int64)
+    child, clique, size, bound = zip(*found)
+    return (np.concatenate(child, axis=1), np.concatenate(clique, axis=1),
+            np.concatenate(size), np.concatenate(bound))
+
+
+def word_columns(A):
+    # Columns of a boolean matrix as little-endian uint64 words: a
+    # (words, columns) array with bit i of column j set for A[i, j]
+    packed = np.packbits(A.T, axis=1, bitorder='little')
+    pad = np.zeros((A.shape[1], -packed.shape[1] % 8), dtype=np.uint8)
+    words = np.ascontiguousarray(np.concatenate([packed, pad], axis=1)).view('<u8')
+    return np.ascontiguousarray(words.T)
+
+
+def unpack_bitsets(rows, vertices):
+    # Boolean matrix of the `vertices` columns of bitset rows (none of which
+    # has a bit past max(vertices)), the reverse of bitsets
+    width = (max(vertices) + 8) // 8
+    data = b''.join(row.to_bytes(width, 'little') for row in rows)
+    bits = np.unpackbits(np.frombuffer(data, dtype=np.uint8).reshape(len(vertices), width),
+                         axis=1, bitorder='little')
+    return bits[:, vertices].astype(bool)
+
+
+def bitsets(A):
+    # One Python int per row of a boolean adjacency matrix, bit j set for A[i, j]
+    packed = np.packbits(A, axis=1, bitorder='little')
+    return [int.from_bytes(row.tobytes(), 'little') for row in packed]
+
+
+def packed_rows(A):
+    # Rows of a stack of boolean adjacency matrices (..., n, n), n <= 64, as
+    # uint64 bitsets with bit j set for A[..., i, j]
+    packed = np.packbits(A, axis=-1, bitorder='little')
+    pad = np.zeros(packed.shape[:-1] + (8 - packed.shape[-1],), dtype=np.uint8)
+    return np.concatenate([packed, pad], axis=-1).view('<u8')[..., 0]
+
+
+def has_clique_batch(rows, k):
+    # has_clique for a whole batch of graphs at once; `rows` has shape
+    # (batch, n) with uint64 neighbour bitsets. The recursion of has_clique
+    # becomes a worklist of (graph, missing size, candidate bitset) entries
+    # that is advanced in lockstep: every round each entry branches on its
+    # lowest candidate w into "w in the clique" and "w not in the clique".
+    # Entries without enough candidates, and all entries of graphs that
+    # already have a clique, are dropped, so most graphs stop after about k
+    # rounds.
+    size, n = rows.shape
+    found = np.zeros(size, dtype=bool)
+    if k <= 1:
+        found[:] = k <= 0 or n > 0
+        return found
+    one = np.uint64(1)
+    graph = np.arange(size)
+    missing = np.full(size, k)
+    candidates = np.full(size, ~np.uint64(0) >> np.uint64(64 - n))
+    while len(graph):
+        keep = (np.bitwise_count(candidates) >= missing) & ~found[graph]
+        done = keep & (missing == 1)
+        found[graph[done]] = True
+        keep &= ~done
+        graph, missing, candidates = graph[keep], missing[keep], candidates[keep]
+        low = candidates & (~candidates + one)
+        w = np.bitwise_count(low - one).astype(np.int64)
+        rest = candidates ^ low
+        candidates = np.concatenate([rest & rows[graph, w], rest])
+        graph = np.concatenate([graph, graph])
+        missing = np.concatenate([missing - 1, missing])
+    return found
+
+
+class CliqueDetector:
+    # Tracks every monochromatic clique of an edge coloring, K_s in color 0,
+    # K_t in color 1 and so on. Each color keeps one Python int per vertex as
+    # a bitset of its neighbours in that color, so a common neighbourhood
+    # N_c(u) & N_c(v) is a single AND. Large dense colorings can hold far
+    # too many cliques to list, so tracking stops once more than `limit`
+    # are found (overflow) until the next full rescan.
+    def __init__(self, num_colors, sizes, limit=100000):
+        self.colors = range(num_colors)
+        self.sizes = list(sizes)
+        self.limit = limit
+        self.overflow = False
+        self.n = 0
+        self.adj = [[] for _ in self.colors]
+        self.cliques = [set() for _ in self.colors]  # Sorted vertex tuples
+        self.edge_count = {}  # edge id -> number of tracked cliques using that edge
+        self.interrupt = None  # Optional callable polled during a rescan; may raise to abort
+
+    def sync(self, model):
+        # Full rebuild and rescan, used when a new graph is generated
+        self.n = model.n
+        self.adj = [bitsets(A) for A in model.adjacencies()]
+        self.rescan()
+
+    def set_sizes(self, sizes):
+        if list(sizes) != self.sizes:
+            self.sizes = list(sizes)
+            self.rescan()
+
+    def rescan(self):
+        self.cliques = [set() for _ in self.colors]
+        self.edge_count = {}
+        self.overflow = False
+        for color in self.colors:
+            adj = self.adj[color]
+            for i in range(self.n):
+                if self.interrupt is not None:
+                    self.interrupt()
+                # Only extend with higher-indexed neighbours so each clique is found once
+                higher = adj[i] >> (i + 1) << (i + 1)
+                room = self.limit - sum(len(c) for c in self.cliques)
+                found = self.cliques_in(adj, higher, self.sizes[color] - 1, (i,), room + 1)
+                if len(found) > room:
+                    self.check_limit(force=True)
+                    return
+                for clique in found:
+                    self.add_clique(color, clique)
+
+    def check_limit(self, force=False):
+        # Give up tracking (and free the lists) once there are too many cliques
+        if not force and (self.overflow or sum(len(c) for c in self.cliques) <= self.limit):
+            return self.overflow
+        self.overflow = True
+        self.cliques = [set() for _ in self.colors]
+        self.edge_count = {}
+        return True
+
+    def add_vertex(self):
+        self.n += 1
+        for adj in self.adj:
+            adj.append(0)
+
+    def set_edge(self, i, j, color):
+        # Recolor edge (i, j); None removes it. Only cliques through the edge
+        # can change, so only the common neighbourhood of i and j is searched.
+        # After an overflow only the adjacency is kept up to date.
+        for old in self.colors:
+            adj = self.adj[old]
+            if adj[i] >> j & 1 and old != color:
+                if not self.overflow:
+                    for clique in self.cliques_through(adj, i, j, self.sizes[old]):
+                        self.remove_clique(old, clique)
+                adj[i] &= ~(1 << j)
+                adj[j] &= ~(1 << i)
+        if color is not None:
+            adj = self.adj[color]
+            if not adj[i] >> j & 1:
+                adj[i] |= 1 << j
+                adj[j] |= 1 << i
+                if not self.overflow:
+                    for clique in self.cliques_through(adj, i, j, self.sizes[color]):
+                        self.add_clique(color, clique)
+                    self.check_limit()
+
+    def cliques_through(self, adj, i, j, size):
+        if size < 2:
+            return []
+        return [tuple(sorted(c + (i, j)))
+                for c in self.cliques_in(adj, adj[i] & adj[j], size - 2, ())]
+
+    def cliques_in(self, adj, candidates, k, prefix, limit=None):
+        # All k-cliques inside the `candidates` bitset, each extending
+        # `prefix`; stops early once `limit` have been found
+        found = []
+        stack = [(candidates, k, prefix)]
+        while stack:
+            P, k, prefix = stack.pop()
+            if k == 0:
+                found.append(prefix)
+                if len(found) == limit:
+                    break
+                continue
+            while P and P.bit_count() >= k:
+                low = P & -P
+                w = low.bit_length() - 1
+                P ^= low
+                stack.append((P & adj[w], k - 1, prefix + (w,)))
+        return found
+
+    def add_clique(self, color, clique):
+        if clique in self.cliques[color]:
+            return
+        self.cliques[color].add(clique)
+        for i, j in combinations(clique, 2):
+            k = edge_id(i, j)
+            self.edge_count[k] = self.edge_count.get(k, 0) + 1
+
+    def remove_clique(self, color, clique):
+        if clique not in self.cliques[color]:
+            return
+        self.cliques[color].discard(clique)
+        for i, j in combinations(clique, 2):
+            k = edge_id(i, j)
+            self.edge_count[k] -= 1
+            if not self.edge_count[k]:
+                del self.edge_count[k]
+
+    def count(self, color):
+        return len(self.cliques[color])
+
+    def clique_vertices(self, color, limit=None):
+        # Tracked monochromatic cliques of `color` as sorted vertex tuples,
+        # all of them or just the first `limit`
+        if limit is None:
+            return sorted(self.cliques[color])
+        return heapq.nsmallest(limit, self.cliques[color])
+
+    def clique_edge_ids(self):
+        # Edge ids that lie in at least one tracked clique
+        return np.fromiter(self.edge_count, dtype=np.int64, count=len(self.edge_count))
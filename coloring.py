@@ -0,0 +1,133 @@
+import math
+import numpy as np
+
+
+def edge_total(n):
+    return n * (n - 1) // 2
+
+
+def edge_id(u, v):
+    # Edges are packed column by column: (0,1), (0,2), (1,2), (0,3), ... so
+    # adding vertex n only appends the ids of its new edges (i, n)
+    if u > v:
+        u, v = v, u
+    return v * (v - 1) // 2 + u
+
+
+def edge_ends(k):
+    v = (1 + math.isqrt(1 + 8 * k)) // 2
+    return k - v * (v - 1) // 2, v
+
+
+def edge_ids(u, v):
+    # Vectorized edge_id for arrays of endpoints
+    u = np.asarray(u, dtype=np.int64)
+    v = np.asarray(v, dtype=np.int64)
+    lo = np.minimum(u, v)
+    hi = np.maximum(u, v)
+    return hi * (hi - 1) // 2 + lo
+
+
+def edge_ends_array(ids):
+    # Vectorized edge_ends; 1 + 8k is a perfect square at triangular numbers,
+    # so the float square root is exact there
+    ids = np.asarray(ids, dtype=np.int64)
+    v = ((1 + np.sqrt(1 + 8 * ids)) // 2).astype(np.int64)
+    return ids - v * (v - 1) // 2, v
+
+
+def all_edge_ends(n):
+    # (u, v) endpoint arrays for every edge id of K_n, in id order
+    v = np.repeat(np.arange(n, dtype=np.int64), np.arange(n))
+    u = np.arange(edge_total(n), dtype=np.int64) - v * (v - 1) // 2
+    return u, v
+
+
+def batch_adjacency(n, edges):
+    # (batch, n, n) symmetric bool adjacency matrices from a (batch, edges)
+    # bool array indexed by edge id
+    u, v = all_edge_ends(n)
+    adj = np.zeros((len(edges), n, n), dtype=bool)
+    adj[:, u, v] = edges
+    adj |= adj.transpose(0, 2, 1)
+    return adj
+
+
+class ColoringModel:
+    # Edge coloring of a graph on vertices 0..n-1. Presence, color index and
+    # line width live in packed uint8 arrays with one entry per vertex pair,
+    # indexed by edge_id.
+    __slots__ = ('n', 'colors', 'present', 'color', 'width')
+
+    def __init__(self, n, colors):
+        self.n = n
+        self.colors = list(colors)
+        m = edge_total(n)
+        self.present = np.zeros(m, dtype=np.uint8)
+        self.color = np.zeros(m, dtype=np.uint8)
+        self.width = np.full(m, 2, dtype=np.uint8)
+
+    def randomize(self, rng=None):
+        # Complete graph with a uniformly random color on every edge
+        rng = np.random.default_rng() if rng is None else rng
+        self.present[:] = 1
+        self.color[:] = rng.integers(0, len(self.colors), size=self.color.size, dtype=np.uint8)
+        self.width[:] = 2
+
+    def load(self, coloring):
+        # Complete graph with the given color index per edge id
+        self.present[:] = 1
+        self.color[:] = coloring
+        self.width[:] = 2
+
+    def clear(self):
+        self.present[:] = 0
+
+    def add_vertex(self):
+        # The new vertex's edges all sort after the existing ones
+        new = self.n
+        self.n += 1
+        self.present = np.concatenate([self.present, np.zeros(new, dtype=np.uint8)])
+        self.color = np.concatenate([self.color, np.zeros(new, dtype=np.uint8)])
+        self.width = np.concatenate([self.width, np.full(new, 2, dtype=np.uint8)])
+        return new
+
+    def copy(self):
+        # Independent snapshot, e.g. to hand to another process
+        other = ColoringModel(0, self.colors)
+        other.n = self.n
+        other.present = self.present.copy()
+        other.color = self.color.copy()
+        other.width = self.width.copy()
+        return other
+
+    def has_edge(self, u, v):
+        return bool(self.present[edge_id(u, v)])
+
+    def add_edge(self, u, v, color=0, width=2):
+        k = edge_id(u, v)
+        self.present[k] = 1
+        self.color[k] = color
+        self.width[k] = width
+        return k
+
+    def remove_edge(self, u, v):
+        self.present[edge_id(u, v)] = 0
+
+    def num_edges(self):
+        return int(np.count_nonzero(self.present))
+
+    def edge_list(self):
+        # Ids and endpoints of every present edge
+        ids = np.flatnonzero(self.present)
+        u, v = edge_ends_array(ids)
+        return ids, u, v
+
+    def adjacencies(self):
+        # One adjacency plane per color, (colors, n, n), filled in a single
+        # scatter so the cost grows with the number of edges, not colors
+        ids, u, v = self.edge_list()
+        A = np.zeros((len(self.colors), self.n, self.n), dtype=bool)
+        A[self.color[ids], u, v] = True
+        A[self.color[ids], v, u] = True
+        return A
@@ -0,0 +1,122 @@
+import math
+
+import numpy as np
+
+from coloring import all_edge_ends
+from cliques import has_clique
+from search import PoolSearch, request_stop, stop_requested
+
+
+# Circulant colorings of K_n: edge (i, j) is red when the distance
+# (j - i) mod n lies in a connection set S with S = -S, and blue otherwise.
+# A symmetric S is fixed by which distances 1..n//2 it contains, so it is
+# handled as a bitmask with bit d - 1 for distance d. Rotations are
+# automorphisms of both color classes, so every monochromatic clique can be
+# rotated to contain vertex 0, and only cliques through vertex 0 need to
+# be checked.
+
+
+def full_set(n, mask):
+    # Connection set S for a bitmask over distances 1..n//2
+    half = [d for d in range(1, n // 2 + 1) if mask >> (d - 1) & 1]
+    return sorted(set(half) | {n - d for d in half})
+
+
+def paley_set(q):
+    # Quadratic residues mod a prime q = 1 (mod 4); -1 is a residue, so the
+    # set is symmetric and the red and blue graphs are isomorphic
+    if q < 5 or q % 4 != 1 or any(q % p == 0 for p in range(2, math.isqrt(q) + 1)):
+        raise ValueError("Paley colorings need a prime q with q % 4 == 1")
+    return sorted({x * x % q for x in range(1, q)})
+
+
+def circulant_coloring(n, S):
+    # Color index per edge id (0 red, 1 blue), ready for ColoringModel.load
+    u, v = all_edge_ends(n)
+    return np.where(np.isin((v - u) % n, list(S)), 0, 1).astype(np.uint8)
+
+
+def circulant_rows(n, S):
+    # Neighbour bitsets of the circulant graph, as used by cliques.has_clique
+    base = sum(1 << (d % n) for d in S)
+    everyone = (1 << n) - 1
+    return [((base << i) | (base >> (n - i))) & everyone for i in range(n)]
+
+
+def circulant_has_clique(n, S, k):
+    # A K_k through vertex 0 is a K_{k-1} inside its neighbourhood
+    rows = circulant_rows(n, S)
+    return k <= 1 or has_clique(rows, rows[0], k - 1)
+
+
+def circulant_avoids(n, S, sizes):
+    # True if the circulant coloring has no red K_s and no blue K_t
+    blue = sorted(set(range(1, n)) - set(S))
+    return not (circulant_has_clique(n, S, sizes[0]) or circulant_has_clique(n, blue, sizes[1]))
+
+
+def multiplier_maps(n):
+    # For each unit a mod n (up to sign), where bit d - 1 of a mask moves
+    # when the set is multiplied by a; x -> a x is an isomorphism between
+    # the circulant colorings of S and a S
+    maps = []
+    for a in range(2, n // 2 + 1):
+        if math.gcd(a, n) == 1:
+            maps.append([min(a * d % n, n - a * d % n) - 1 for d in range(1, n // 2 + 1)])
+    return maps
+
+
+def is_canonical(mask, maps, full):
+    # Whether `mask` is the smallest mask in its class under multipliers
+    # (and under swapping the colors, when `full` is given)
+    for target in maps:
+        image = 0
+        rest = mask
+        while rest:
+            low = rest & -rest
+            image |= 1 << target[low.bit_length() - 1]
+            rest ^= low
+        if image < mask or (full and full ^ image < mask):
+            return False
+    return not full or full ^ mask >= mask
+
+
+def search_range(n, sizes, start, stop):
+    # Check every canonical mask in [start, stop); returns (checked, witness mask)
+    maps = multiplier_maps(n)
+    # Swapping colors only maps witnesses to witnesses when s == t
+    full = (1 << (n // 2)) - 1 if sizes[0] == sizes[1] else 0
+    checked = 0
+    for mask in range(start, stop):
+        if checked % 256 == 0 and stop_requested():
+            return checked, None
+        if not is_canonical(mask, maps, full):
+            continue
+        checked += 1
+        if circulant_avoids(n, full_set(n, mask), sizes):
+            request_stop()
+            return checked, mask
+    return checked, None
+
+
+class CirculantSearch(PoolSearch):
+    # Tries every symmetric connection set S of Z_n, up to multipliers and
+    # color swap, for a circulant coloring with no red K_s and no blue K_t.
+    # The 2^(n//2) masks are split into ranges across a process pool and
+    # the first witness stops the others. Same interface as RamseySearch.
+    def __init__(self, n, sizes, processes=None, chunks=64):
+        total = 1 << (n // 2)
+        step = -(-total // chunks)
+        self.checked = 0
+        self.connection_set = None
+        tasks = [(search_range, (n, tuple(sizes), lo, min(lo + step, total)))
+                 for lo in range(0, total, step)]
+        super().__init__(n, sizes, tasks, processes)
+
+    def record(self, result):
+        checked, mask = result
+        self.checked += checked
+        if mask is not None and self.witness is None:
+            # Stored before the witness, which is what the GUI polls for
+            self.connection_set = full_set(self.n, mask)
+            self.witness = circulant_coloring(self.n, self.connection_set)
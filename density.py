@@ -0,0 +1,99 @@
+import numpy as np
+
+
+# Level-of-detail rendering for graphs with too many edges to draw as lines.
+# Every edge is sampled at points spread along it, and each sample adds ink
+# (covered pixel length times line width) to the pixel it lands in, one
+# accumulation plane per color. All edges are handled in one vectorized pass
+# over the (E, 2, 2) segment array; the number of samples per edge is
+# proportional to its on-screen length and capped by a global budget.
+
+
+def edge_phase(ids):
+    # Fixed sub-sample offset per edge id, so removing an edge later lands
+    # on exactly the pixels it was added to
+    return (np.asarray(ids, dtype=np.float64) * 0.6180339887498949) % 1.0
+
+
+def segments_in_view(segments, extent):
+    # Which segments cross the rectangle `extent` (Liang-Barsky clipping)
+    x0, x1, y0, y1 = extent
+    start = segments[:, 0]
+    delta = segments[:, 1] - start
+    t_in = np.zeros(len(segments))
+    t_out = np.ones(len(segments))
+    with np.errstate(divide='ignore', invalid='ignore'):
+        for axis, lo, hi in ((0, x0, x1), (1, y0, y1)):
+            p = start[:, axis]
+            d = delta[:, axis]
+            t1 = (lo - p) / d
+            t2 = (hi - p) / d
+            # Parallel to this side: either always inside the slab or never
+            flat = d == 0
+            inside = (p >= lo) & (p <= hi)
+            t1[flat] = np.where(inside[flat], -np.inf, np.inf)
+            t2[flat] = np.where(inside[flat], np.inf, -np.inf)
+            np.maximum(t_in, np.minimum(t1, t2), out=t_in)
+            np.minimum(t_out, np.maximum(t1, t2), out=t_out)
+    return t_in <= t_out
+
+
+def pixel_lengths(segments, extent, shape):
+    x0, x1, y0, y1 = extent
+    h, w = shape
+    d = segments[:, 1] - segments[:, 0]
+    return np.hypot(d[:, 0] * (w / (x1 - x0)), d[:, 1] * (h / (y1 - y0)))
+
+
+def sample_scale(segments, extent, shape, budget):
+    # Samples per pixel of edge length that keeps the total within `budget`
+    total = pixel_lengths(segments, extent, shape).sum()
+    return 1.0 if total <= budget else budget / total
+
+
+def accumulate(planes, segments, channels, ink, phase, extent, scale, sign=1):
+    # Add (sign=1) or remove (sign=-1) the edges' ink in `planes`, an array of
+    # shape (colors, height, width) covering `extent` = (x0, x1, y0, y1)
+    colors, h, w = planes.shape
+    if not len(segments):
+        return
+    x0, x1, y0, y1 = extent
+    sx = w / (x1 - x0)
+    sy = h / (y1 - y0)
+    ax = ((segments[:, 0, 0] - x0) * sx).astype(np.float32)
+    ay = ((segments[:, 0, 1] - y0) * sy).astype(np.float32)
+    dx = ((segments[:, 1, 0] - segments[:, 0, 0]) * sx).astype(np.float32)
+    dy = ((segments[:, 1, 1] - segments[:, 0, 1]) * sy).astype(np.float32)
+    length = np.hypot(dx, dy)
+    k = np.maximum(1, np.rint(length * scale)).astype(np.int64)
+
+    # Sample j of edge e sits at t = (j + phase_e) / k_e along the edge.
+    # Per-edge values are spread over samples with np.repeat, which streams
+    # through memory instead of gathering by index.
+    first = np.cumsum(k) - k
+    t = (np.arange(first[-1] + k[-1]) - np.repeat(first, k)).astype(np.float32)
+    t += np.repeat(phase.astype(np.float32), k)
+    t *= np.repeat((1 / k).astype(np.float32), k)
+    x = np.repeat(ax, k) + t * np.repeat(dx, k)
+    y = np.repeat(ay, k) + t * np.repeat(dy, k)
+    inside = (x >= 0) & (x < w) & (y >= 0) & (y < h)
+    flat = np.repeat(channels.astype(np.int64) * (h * w), k)[inside]
+    flat += y[inside].astype(np.int64) * w + x[inside].astype(np.int64)
+    weight = np.repeat(ink * length / k, k)[inside]
+    planes += sign * np.bincount(flat, weights=weight, minlength=planes.size).reshape(planes.shape)
+
+
+def composite(planes, palette):
+    # RGBA image: each pixel mixes the palette by its share of ink per color,
+    # and opacity saturates with the total ink relative to a typical pixel
+    planes = np.maximum(planes, 0)  # Float round-off after removals
+    total = planes.sum(axis=0)
+    rgba = np.zeros(total.shape + (4,))
+    covered = total > 1e-9
+    if not covered.any():
+        return rgba
+    share = planes[:, covered] / total[covered]
+    rgba[covered, :3] = share.T @ palette[:, :3]
+    reference = np.median(total[covered])
+    rgba[..., 3] = 1 - np.exp(-total / reference)
+    return rgba
@@ -0,0 +1,253 @@
+import multiprocessing as mp
+import time
+
+from cliques import clique_number
+
+
+# A 2-coloring of K_n is the same thing as its red graph, so colorings up to
+# isomorphism are enumerated as graphs by vertex addition with canonical
+# augmentation: a child H = G + v is kept only if v is (up to isomorphism) the
+# vertex H's canonical labeling would delete, so every class has exactly one
+# parent and subtrees can be expanded independently on different workers.
+
+
+class Budget(Exception):
+    pass
+
+
+# The canonical labeling functions take a list of adjacencies on the same
+# vertices, one per color class; a graph is a one-element list. A vertex
+# pair is then in at most one of them, as in a coloring with absent edges.
+
+
+def refine(adjs, cells):
+    # Split cells by neighbour counts into every other cell, in every
+    # adjacency, until the partition is equitable; pieces are ordered by
+    # count so the result does not depend on vertex labels
+    # A graph's pieces are keyed by the plain count, the hot path in
+    # enumeration
+    graph = adjs[0] if len(adjs) == 1 else None
+    changed = True
+    while changed:
+        changed = False
+        for splitter in cells:
+            mask = 0
+            for w in splitter:
+                mask |= 1 << w
+            refined = []
+            for cell in cells:
+                if len(cell) == 1:
+                    refined.append(cell)
+                    continue
+                pieces = {}
+                for v in cell:
+                    if graph is not None:
+                        key = (graph[v] & mask).bit_count()
+                    else:
+                        key = tuple((adj[v] & mask).bit_count() for adj in adjs)
+                    pieces.setdefault(key, []).append(v)
+                if len(pieces) > 1:
+                    changed = True
+                    refined.extend(pieces[k] for k in sorted(pieces))
+                else:
+                    refined.append(cell)
+            cells = refined
+            if changed:
+                break
+    return cells
+
+
+def encode(adj, perm):
+    # Edge bits of the graph relabelled by `perm` (position -> vertex), in
+    # coloring.edge_id order
+    cert = 0
+    k = 0
+    for j in range(1, len(perm)):
+        row = adj[perm[j]]
+        for i in range(j):
+            if row >> perm[i] & 1:
+                cert |= 1 << k
+            k += 1
+    return cert
+
+
+def all_twins(adjs, cell):
+    # True if every vertex of the cell has the same neighbours as the first
+    # (ignoring each other) in every adjacency, so individualizing any one
+    # of them is equivalent
+    first = cell[0]
+    for adj in adjs:
+        joined = adj[first] >> cell[1] & 1
+        for w in cell[1:]:
+            if adj[first] >> w & 1 != joined:
+                return False
+            if adj[w] & ~(1 << first) != adj[first] & ~(1 << w):
+                return False
+    return True
+
+
+def canonical_form(adjs, n, budget=None):
+    # Largest certificate (one encode per adjacency) over the leaves of the
+    # individualization-refinement tree, with the labeling that produces it.
+    # Twin cells are individualized once, and automorphisms found at the
+    # leaves prune the first level. Raises Budget after `budget` leaves.
+    best = [None, None]
+    orbit = list(range(n))
+    leaves = [0]
+
+    def find(v):
+        while orbit[v] != v:
+            orbit[v] = orbit[orbit[v]]
+            v = orbit[v]
+        return v
+
+    def search(cells, root):
+        if len(cells) == n:
+            leaves[0] += 1
+            if budget is not None and leaves[0] > budget:
+                raise Budget()
+            perm = [cell[0] for cell in cells]
+            cert = tuple(encode(adj, perm) for adj in adjs)
+            if best[0] is None or cert > best[0]:
+                best[0], best[1] = cert, perm
+            elif cert == best[0]:
+                for a, b in zip(best[1], perm):
+                    orbit[find(a)] = find(b)
+            return
+        index = next(i for i, cell in enumerate(cells) if len(cell) > 1)
+        cell = cells[index]
+        tried = []
+        for v in (cell[:1] if all_twins(adjs, cell) else cell):
+            if root and any(find(v) == find(u) for u in tried):
+                continue
+            tried.append(v)
+            rest = [w for w in cell if w != v]
+            search(refine(adjs, cells[:index] + [[v], rest] + cells[index + 1:]), False)
+
+    search(refine(adjs, [list(range(n))] if n else []), True)
+    return best[0], best[1]
+
+
+def coloring_of(cert, n):
+    # Color index per edge id: 0 (red) where the certificate has an edge
+    m = n * (n - 1) // 2
+    return [0 if cert >> k & 1 else 1 for k in range(m)]
+
+
+def classify(adj, n):
+    # Largest monochromatic clique in red and in blue
+    everyone = (1 << n) - 1
+    blue = [everyone & ~adj[v] & ~(1 << v) for v in range(n)]
+    return clique_number(adj, everyone), clique_number(blue, everyone)
+
+
+def children(adj, n, cert, tested):
+    # Canonical children of the graph `adj` on n vertices, as (child
+    # adjacency, child certificate); tested[0] counts the candidates tried
+    seen = set()
+    degrees = [a.bit_count() for a in adj]
+    for S in range(1 << n):
+        tested[0] += 1
+        # The deleted vertex is always picked among those of minimum degree
+        deg_new = S.bit_count()
+        if any(degrees[i] + (S >> i & 1) < deg_new for i in range(n)):
+            continue
+        child = [adj[i] | ((S >> i & 1) << n) for i in range(n)] + [S]
+        (child_cert,), perm = canonical_form([child], n + 1)
+        if child_cert in seen:
+            continue
+        low = min(c.bit_count() for c in child)
+        m = next(w for w in reversed(perm) if child[w].bit_count() == low)
+        if m != n:
+            # Accept only if deleting the canonical vertex gives back the parent
+            rest = [w for w in range(n + 1) if w != m]
+            index = {w: i for i, w in enumerate(rest)}
+            parent = [0] * n
+            for i, w in enumerate(rest):
+                for x in rest:
+                    if child[w] >> x & 1:
+                        parent[i] |= 1 << index[x]
+            if canonical_form([parent], n)[0] != (cert,):
+                continue
+        seen.add(child_cert)
+        yield child, child_cert
+
+
+def expand(adj, n, cert, target, records, tested):
+    # Collect every canonical descendant with `target` vertices, with its
+    # clique numbers, into `records`
+    if n == target:
+        records.append((cert,) + classify(adj, n))
+        return
+    for child, child_cert in children(adj, n, cert, tested):
+        expand(child, n + 1, child_cert, target, records, tested)
+
+
+def level(target):
+    # Canonical representatives on `target` vertices, generated serially
+    graphs = [([0], 1, 0)]
+    tested = [0]
+    for _ in range(1, target):
+        graphs = [(child, n + 1, c) for adj, n, cert in graphs
+                  for child, c in children(adj, n, cert, tested)]
+    return graphs
+
+
+def expand_task(adj, n, cert, target):
+    records = []
+    tested = [0]
+    expand(adj, n, cert, target, records, tested)
+    return records, tested[0]
+
+
+class ColoringEnumerator:
+    # Enumerates every 2-coloring of K_n up to isomorphism. The tree is grown
+    # serially to a few vertices below n, and each subtree below that is
+    # expanded by a worker in a process pool.
+    def __init__(self, n, processes=None):
+        self.n = n
+        self.start = time.perf_counter()
+        self.records = []  # (certificate, red clique number, blue clique number)
+        self.tested = 0
+        self.finished = 0
+        split = max(1, n - 3)
+        roots = level(split)
+        self.tasks = len(roots)
+        self.pool = mp.Pool(processes)
+        for adj, k, cert in roots:
+            self.pool.apply_async(expand_task, (adj, k, cert, n), callback=self.collect)
+        self.pool.close()
+
+    def collect(self, result):
+        # Runs on the pool's result thread as each subtree finishes
+        records, tested = result
+        self.records.extend(records)
+        self.tested += tested
+        self.finished += 1
+
+    def done(self):
+        return self.finished >= self.tasks
+
+    def elapsed(self):
+        return time.perf_counter() - self.start
+
+    def rate(self):
+        elapsed = self.elapsed()
+        return len(self.records) / elapsed if elapsed > 0 else 0.0
+
+    def results(self):
+        # Representatives sorted by certificate, so stepping order is stable
+        return sorted(self.records)
+
+    def summary(self):
+        # Number of classes for each (red, blue) largest clique pair
+        table = {}
+        for _, red, blue in self.records:
+            table[(red, blue)] = table.get((red, blue), 0) + 1
+        return dict(sorted(table.items()))
+
+    def wait(self):
+        self.pool.join()
+
+    def cancel(self):
+        self.pool.terminate()
@@ -0,0 +1,148 @@
+import json
+import math
+import multiprocessing as mp
+import os
+import sys
+import time
+
+import numpy as np
+
+from coloring import batch_adjacency, edge_total
+from cliques import has_clique_batch, packed_rows
+
+
+# Monte Carlo estimate of the probability that a uniformly random 2-coloring
+# of K_n has no red K_s and no blue K_t. Samples are drawn in tasks of
+# `batch` colorings, each a (batch, n, n) boolean tensor of red adjacency
+# matrices checked with has_clique_batch. Task i always draws from its own
+# stream, SeedSequence(seed, spawn_key=(i,)), so the result does not depend
+# on the number of processes and a resumed run continues exactly where the
+# checkpoint left off.
+
+MAX_N = 64  # Adjacency rows are packed into one uint64
+
+
+def sample_avoiding(n, sizes, batch, seed, index):
+    # Number of colorings in task `index` avoiding both cliques
+    rng = np.random.default_rng(np.random.SeedSequence(seed, spawn_key=(index,)))
+    colorings = rng.integers(0, 2, size=(batch, edge_total(n)), dtype=np.uint8)
+    red = batch_adjacency(n, colorings == 0)
+    blue = batch_adjacency(n, colorings == 1)
+    avoid = ~has_clique_batch(packed_rows(red), sizes[0])
+    # Blue is only checked where red failed to produce a clique
+    avoid[avoid] = ~has_clique_batch(packed_rows(blue[avoid]), sizes[1])
+    return int(np.count_nonzero(avoid))
+
+
+def run_task(args):
+    return args[-1], sample_avoiding(*args)
+
+
+def first_moment(n, sizes):
+    # Expected number of red K_s plus blue K_t; by the union bound the
+    # avoidance probability is at least 1 minus this (Erdos, 1947)
+    return sum(math.comb(n, k) * 2.0 ** -math.comb(k, 2) for k in sizes)
+
+
+def wilson_interval(hits, trials, z=1.959964):
+    # 95% score interval for a binomial proportion; stays useful when hits is 0
+    if trials == 0:
+        return 0.0, 1.0
+    p = hits / trials
+    denom = 1 + z * z / trials
+    center = (p + z * z / (2 * trials)) / denom
+    half = z * math.sqrt(p * (1 - p) / trials + z * z / (4 * trials * trials)) / denom
+    return max(0.0, center - half), min(1.0, center + half)
+
+
+def load_checkpoint(path, n, sizes, samples, batch, seed):
+    # A run without a seed resumes with the one in the checkpoint; any other
+    # difference would make the resumed counts wrong, so it is refused
+    if path is None or not os.path.exists(path):
+        return None
+    with open(path) as f:
+        state = json.load(f)
+    if ((state["n"], state["s"], state["t"], state["batch"], state.get("requested"))
+            != (n, sizes[0], sizes[1], batch, samples)
+            or seed is not None and state["seed"] != seed):
+        raise ValueError(f"checkpoint {path} is for n={state['n']}, s={state['s']}, "
+                         f"t={state['t']}, samples={state.get('requested')}, "
+                         f"batch={state['batch']}, seed={state['seed']}")
+    return state
+
+
+def save_checkpoint(path, state):
+    # Write-then-rename, so an interrupted save leaves the old checkpoint intact
+    tmp = path + ".tmp"
+    with open(tmp, 'w') as f:
+        json.dump(state, f)
+    os.replace(tmp, path)
+
+
+def run_estimate(n, sizes, samples, out=sys.stdout, seed=None, batch=2000, processes=None,
+                 checkpoint=None, checkpoint_every=10.0, report_every=5.0, cache=None):
+    # Stream JSONL progress records and a final summary; returns the summary.
+    # Seeded runs are deterministic, so their summary can come from `cache`.
+    if not 2 <= n <= MAX_N:
+        raise ValueError(f"n must be between 2 and {MAX_N}")
+    run_key = f"estimate:{n}:{sizes[0]},{sizes[1]}:{samples}:{batch}:{seed}"
+    if cache is not None and seed is not None:
+        summary = cache.get(run_key)
+        if summary is not None:
+            out.write(json.dumps(dict(summary, cached=True)) + "\n")
+            out.flush()
+            return summary
+    state = load_checkpoint(checkpoint, n, sizes, samples, batch, seed)
+    if state is None:
+        if seed is None:
+            seed = np.random.SeedSequence().entropy
+        state = {"n": n, "s": sizes[0], "t": sizes[1], "batch": batch, "seed": seed,
+                 "requested": samples, "tasks": 0, "samples": 0, "avoiding": 0, "elapsed": 0.0}
+    tasks = -(-samples // batch)
+    start = time.perf_counter()
+    resumed = state["samples"]
+    bound = first_moment(n, sizes)
+
+    def record(kind):
+        elapsed = state["elapsed"] + time.perf_counter() - start
+        low, high = wilson_interval(state["avoiding"], state["samples"])
+        run_time = time.perf_counter() - start
+        result = {"type": kind, "n": n, "s": sizes[0], "t": sizes[1],
+                  "samples": state["samples"], "avoiding": state["avoiding"],
+                  "estimate": state["avoiding"] / state["samples"] if state["samples"] else None,
+                  "ci95": [low, high],
+                  "expected_cliques": bound, "first_moment_bound": max(0.0, 1 - bound),
+                  "elapsed": round(elapsed, 3),
+                  "rate": round((state["samples"] - resumed) / run_time, 1) if run_time > 0 else None}
+        out.write(json.dumps(result) + "\n")
+        out.flush()
+        return result
+
+    def save():
+        if checkpoint is not None:
+            saved = dict(state, elapsed=state["elapsed"] + time.perf_counter() - start)
+            save_checkpoint(checkpoint, saved)
+
+    jobs = ((n, sizes, min(batch, samples - i * batch), state["seed"], i)
+            for i in range(state["tasks"], tasks))
+    last_report = last_save = time.perf_counter()
+    # Results come back in task order, so the checkpoint is always a prefix
+    with mp.Pool(processes) as pool:
+        try:
+            for index, found in pool.imap(run_task, jobs):
+                state["tasks"] = index + 1
+                state["samples"] += min(batch, samples - index * batch)
+                state["avoiding"] += found
+                now = time.perf_counter()
+                if now - last_save >= checkpoint_every:
+                    save()
+                    last_save = now
+                if now - last_report >= report_every:
+                    record("progress")
+                    last_report = now
+        finally:
+            save()
+    summary = record("summary")
+    if cache is not None and seed is not None and state["seed"] == seed:
+        cache.put(run_key, summary)
+    return summary
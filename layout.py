@@ -0,0 +1,189 @@
+import hashlib
+from collections import OrderedDict
+
+import numpy as np
+
+from coloring import edge_ends_array
+
+LAYOUTS = ('circular', 'spectral', 'force', 'cliques')
+
+
+# Vertex placement. Every layout returns an (n, 2) array scaled into the
+# [-1, 1] square the axes show. Force layouts are Fruchterman-Reingold:
+# springs along the edges, all-pairs repulsion and a cooling step cap, with
+# every iteration a handful of whole-array operations. Above `exact_limit`
+# vertices the repulsion is approximated on a grid: vertices in the same or
+# a neighbouring cell repel exactly, farther cells act through their
+# centroid.
+
+
+def normalize(coords):
+    coords = coords - coords.mean(axis=0)
+    extent = np.abs(coords).max() if len(coords) else 0.0
+    return coords / extent if extent > 0 else coords
+
+
+def circular_layout(n):
+    angles = 2 * np.pi * np.arange(n) / max(n, 1)
+    return np.column_stack([np.cos(angles), np.sin(angles)])
+
+
+def spectral_layout(n, u, v):
+    # Laplacian eigenvectors of the two smallest non-trivial eigenvalues
+    if n < 3 or not len(u):
+        return circular_layout(n)
+    L = np.zeros((n, n))
+    np.add.at(L, (u, v), -1.0)
+    np.add.at(L, (v, u), -1.0)
+    L[np.diag_indices(n)] = -L.sum(axis=1)
+    _, vectors = np.linalg.eigh(L)
+    return normalize(vectors[:, 1:3])
+
+
+def near_pairs(cell_x, cell_y, g):
+    # Index pairs (i, j), i != j, of vertices in the same or adjacent grid cells
+    n = len(cell_x)
+    cell = cell_y * g + cell_x
+    order = np.argsort(cell, kind='stable')
+    counts = np.bincount(cell, minlength=g * g)
+    starts = np.cumsum(counts) - counts
+    pairs_i, pairs_j = [], []
+    for dx in (-1, 0, 1):
+        for dy in (-1, 0, 1):
+            tx = cell_x + dx
+            ty = cell_y + dy
+            valid = (tx >= 0) & (tx < g) & (ty >= 0) & (ty < g)
+            target = np.where(valid, ty * g + tx, 0)
+            c = np.where(valid, counts[target], 0)
+            offset = np.arange(c.sum()) - np.repeat(np.cumsum(c) - c, c)
+            pairs_i.append(np.repeat(np.arange(n), c))
+            pairs_j.append(order[np.repeat(starts[target], c) + offset])
+    i = np.concatenate(pairs_i)
+    j = np.concatenate(pairs_j)
+    keep = i != j
+    return i[keep], j[keep]
+
+
+def repulsion(P, k2, exact_limit=1000, block=1 << 20):
+    # Sum over j of k^2 (p_i - p_j) / |p_i - p_j|^2 for every vertex i
+    n = len(P)
+    force = np.zeros_like(P)
+    if n <= exact_limit:
+        rows = max(1, block // n)
+        for start in range(0, n, rows):
+            delta = P[start:start + rows, None, :] - P[None, :, :]
+            d2 = np.maximum((delta ** 2).sum(axis=2), 1e-9)
+            d2[np.arange(len(delta)), np.arange(start, start + len(delta))] = np.inf
+            force[start:start + rows] = (delta * (k2 / d2)[:, :, None]).sum(axis=1)
+        return force
+
+    # Grid approximation with O(sqrt(n)) cells, so both halves cost O(n^1.5)
+    # Cell boundaries at coordinate quantiles, so a dense core and a few far
+    # outliers do not put most vertices into one cell
+    g = max(3, int(round(2 * n ** 0.25)))
+    quantiles = np.linspace(0, 1, g + 1)[1:-1]
+    cells = np.column_stack([np.searchsorted(np.quantile(P[:, axis], quantiles), P[:, axis])
+                             for axis in (0, 1)])
+    cell = cells[:, 1] * g + cells[:, 0]
+    mass = np.bincount(cell, minlength=g * g).astype(float)
+    centroid = np.column_stack([np.bincount(cell, P[:, 0], g * g),
+                                np.bincount(cell, P[:, 1], g * g)]) / np.maximum(mass, 1)[:, None]
+    cx, cy = np.divmod(np.arange(g * g), g)[::-1]
+    far = ((np.abs(cells[:, 0, None] - cx) > 1) | (np.abs(cells[:, 1, None] - cy) > 1)) & (mass > 0)
+    dx = P[:, 0, None] - centroid[:, 0]
+    dy = P[:, 1, None] - centroid[:, 1]
+    weight = np.where(far, mass * k2 / np.maximum(dx * dx + dy * dy, 1e-9), 0.0)
+    force[:, 0] += (dx * weight).sum(axis=1)
+    force[:, 1] += (dy * weight).sum(axis=1)
+
+    i, j = near_pairs(cells[:, 0], cells[:, 1], g)
+    delta = P[i] - P[j]
+    scale = k2 / np.maximum((delta ** 2).sum(axis=1), 1e-9)
+    force[:, 0] += np.bincount(i, delta[:, 0] * scale, n)
+    force[:, 1] += np.bincount(i, delta[:, 1] * scale, n)
+    return force
+
+
+def force_layout(n, u, v, weights=None, init=None, iterations=60, temperature=0.2,
+                 exact_limit=1000, seed=0):
+    if n < 2:
+        return np.zeros((n, 2))
+    if init is None:
+        init = circular_layout(n)
+    P = np.array(init, dtype=float)
+    # A little jitter so symmetric starts can still separate
+    P += np.random.default_rng(seed).normal(scale=1e-3, size=P.shape)
+    k = 2.0 / np.sqrt(n)  # Ideal edge length for n vertices in the [-1, 1] square
+    w = np.ones(len(u)) if weights is None else weights
+    for step in range(iterations):
+        disp = repulsion(P, k * k, exact_limit)
+        delta = P[u] - P[v]
+        pull = delta * (np.hypot(delta[:, 0], delta[:, 1]) * w / k)[:, None]
+        for axis in (0, 1):
+            disp[:, axis] -= np.bincount(u, pull[:, axis], n)
+            disp[:, axis] += np.bincount(v, pull[:, axis], n)
+        # Move along the net force by at most the current temperature
+        cap = temperature * (1 - step / iterations)
+        length = np.maximum(np.hypot(disp[:, 0], disp[:, 1]), 1e-9)
+        P += disp * (np.minimum(length, cap) / length)[:, None]
+    return normalize(P)
+
+
+class LayoutEngine:
+    # Computed layouts are cached by kind and graph structure (which vertex
+    # pairs are edges, plus the monochromatic cliques for the color-aware
+    # layout), so redrawing or recoloring edges never recomputes a layout.
+    # A force layout whose graph differs from the last one by at most
+    # `warm_limit` edges is warm-started from the current positions and only
+    # runs a few cool iterations.
+    def __init__(self, capacity=16, warm_limit=32, clique_pull=4.0, exact_limit=1000):
+        self.capacity = capacity
+        self.warm_limit = warm_limit
+        self.clique_pull = clique_pull
+        self.exact_limit = exact_limit
+        self.cache = OrderedDict()  # Key -> (n, 2) array, least recently used first
+        self.last_force = None      # Edge presence of the last force layout computed
+
+    def key(self, kind, model, clique_edges):
+        digest = hashlib.blake2b(model.present.tobytes(), digest_size=16)
+        if kind == 'cliques':
+            digest.update(np.sort(np.asarray(clique_edges, dtype=np.int64)).tobytes())
+        return kind, model.n, digest.hexdigest()
+
+    def layout(self, kind, model, current=None, clique_edges=()):
+        # `current` holds the positions on screen, used for warm starts
+        key = self.key(kind, model, clique_edges)
+        if key in self.cache:
+            self.cache.move_to_end(key)
+            return self.cache[key]
+        coords = self.compute(kind, model, current, clique_edges)
+        self.cache[key] = coords
+        if len(self.cache) > self.capacity:
+            self.cache.popitem(last=False)
+        return coords
+
+    def compute(self, kind, model, current, clique_edges):
+        n = model.n
+        if kind == 'circular':
+            return circular_layout(n)
+        ids = np.flatnonzero(model.present)
+        u, v = edge_ends_array(ids)
+        if kind == 'spectral':
+            return spectral_layout(n, u, v)
+        weights = None
+        if kind == 'cliques':
+            weights = 1.0 + self.clique_pull * np.isin(ids, clique_edges)
+        init, iterations, temperature = None, 60, 0.2
+        if current is not None and self.warm(model.present):
+            init, iterations, temperature = current, 15, 0.02
+        self.last_force = model.present.copy()
+        return force_layout(n, u, v, weights, init, iterations, temperature, self.exact_limit)
+
+    def warm(self, present):
+        # Whether the graph is close enough to the last force layout's
+        last = self.last_force
+        if last is None or len(present) < len(last):
+            return False
+        changed = np.count_nonzero(present[:len(last)] != last)
+        changed += np.count_nonzero(present[len(last):])
+        return changed <= self.warm_limit
@@ -0,0 +1,185 @@
+import math
+import numpy as np
+
+from coloring import edge_total, edge_id
+
+
+class PickEngine:
+    # Hit-testing for clicks on the graph canvas. Vertex coordinates live in an
+    # (N, 2) array and edge endpoints in an (E, 2, 2) array, both indexed by
+    # the same uniform grid, so a pick only measures the few vertices or
+    # edges near the cursor in one batched NumPy computation.
+    def __init__(self, cell_size=0.2):
+        self.cell_size = cell_size
+        self.node_xy = np.empty((0, 2))
+        self.grid = {}  # (cx, cy) -> set of vertex indices
+
+        self.edge_ids = np.empty(0, dtype=np.int64)   # row -> model edge id
+        self.slot = np.empty(0, dtype=np.intp)        # model edge id -> row, or -1
+        self.edge_nodes = np.empty((0, 2), dtype=np.intp)
+        self.segments = np.empty((0, 2, 2))
+        # Edge grid: model edge ids grouped by their endpoints' cells. Edges
+        # added since it was built, or moved to another cell, are "loose" and
+        # measured directly until there are enough of them to rebuild.
+        self.edge_grid = None
+        self.loose = set()
+
+    def cell(self, x, y):
+        return (math.floor(x / self.cell_size), math.floor(y / self.cell_size))
+
+    def sync(self, model, pos):
+        # Full rebuild, used when a new graph is generated or cleared
+        n = model.n
+        self.node_xy = np.array([pos[node] for node in range(n)], dtype=float).reshape(-1, 2)
+        self.grid = {}
+        for i, (x, y) in enumerate(self.node_xy):
+            self.grid.setdefault(self.cell(x, y), set()).add(i)
+
+        ids, u, v = model.edge_list()
+        self.edge_ids = ids
+        self.slot = np.full(edge_total(n), -1, dtype=np.intp)
+        self.slot[ids] = np.arange(ids.size)
+        self.edge_nodes = np.column_stack([u, v]).astype(np.intp)
+        self.segments = self.node_xy[self.edge_nodes]
+        self.build_edge_grid()
+
+    def build_edge_grid(self):
+        # Edges grouped by the pair of grid cells holding their endpoints. A
+        # segment between two cells stays within half a cell diagonal of the
+        # segment between the cell centers, so a group's center segment
+        # bounds how close any of its edges can come to a point.
+        cells, vertex_cell = np.unique(np.floor(self.node_xy / self.cell_size).astype(np.int64),
+                                       axis=0, return_inverse=True)
+        ends = np.sort(vertex_cell.ravel()[self.edge_nodes], axis=1)
+        key = ends[:, 0] * len(cells) + ends[:, 1]
+        order = np.argsort(key, kind='stable')
+        groups, starts = np.unique(key[order], return_index=True)
+        centers = (cells + 0.5) * self.cell_size
+        self.edge_grid = (centers[groups // len(cells)], centers[groups % len(cells)],
+                          np.append(starts, order.size), self.edge_ids[order])
+        self.loose = set()
+
+    def edges_near(self, x, y, low, high):
+        # Model edge ids in the groups whose center segment lies between
+        # `low` and `high` from (x, y) once widened by the cell margin
+        a, b, starts, ids = self.edge_grid
+        dist = segment_distance(a, b - a, x, y) - self.cell_size * math.sqrt(0.5)
+        picked = np.flatnonzero((dist <= high) & (dist > low))
+        sizes = starts[picked + 1] - starts[picked]
+        offsets = np.repeat(starts[picked] - (np.cumsum(sizes) - sizes), sizes)
+        return ids[offsets + np.arange(offsets.size)]
+
+    def loosen(self, ids):
+        # Edges whose grid entries are stale; past a fraction of all edges the
+        # grid is dropped and rebuilt on the next pick
+        self.loose.update(ids.tolist())
+        if len(self.loose) > max(1024, self.edge_ids.size // 16):
+            self.edge_grid = None
+
+    def add_vertex(self, xy):
+        i = len(self.node_xy)
+        self.node_xy = np.vstack([self.node_xy, np.asarray(xy, dtype=float).reshape(1, 2)])
+        self.grid.setdefault(self.cell(*xy), set()).add(i)
+        # The new vertex's edge ids all come after the existing ones
+        self.slot = np.concatenate([self.slot, np.full(i, -1, dtype=np.intp)])
+
+    def move_vertex(self, i, xy):
+        old_cell = self.cell(*self.node_xy[i])
+        new_cell = self.cell(*xy)
+        if old_cell != new_cell:
+            self.grid[old_cell].discard(i)
+            if not self.grid[old_cell]:
+                del self.grid[old_cell]
+            self.grid.setdefault(new_cell, set()).add(i)
+        self.node_xy[i] = xy
+        # Patch the endpoints of every incident edge in place
+        hit = self.edge_nodes == i
+        self.segments[hit] = xy
+        if old_cell != new_cell and self.edge_grid is not None:
+            self.loosen(self.edge_ids[hit.any(axis=1)])
+
+    def add_edge(self, u, v):
+        k = edge_id(u, v)
+        if self.slot[k] >= 0:
+            return
+        self.slot[k] = self.edge_ids.size
+        self.edge_ids = np.append(self.edge_ids, k)
+        ends = np.array([[u, v]], dtype=np.intp)
+        self.edge_nodes = np.vstack([self.edge_nodes, ends])
+        self.segments = np.concatenate([self.segments, self.node_xy[ends]])
+        if self.edge_grid is not None:
+            self.loosen(np.array([k]))
+
+    def remove_edge(self, k):
+        row = self.slot[k]
+        if row < 0:
+            return
+        # Swap-remove so rows stay dense
+        last = self.edge_ids.size - 1
+        if row != last:
+            for arr in (self.edge_ids, self.edge_nodes, self.segments):
+                arr[row] = arr[last]
+            self.slot[self.edge_ids[row]] = row
+        self.slot[k] = -1
+        self.edge_ids = self.edge_ids[:last]
+        self.edge_nodes = self.edge_nodes[:last]
+        self.segments = self.segments[:last]
+        # Its grid entry stays; closest() skips removed edges
+
+    def nearest_vertex(self, x, y, radius):
+        # Only the grid cells within `radius` of the click are searched
+        cx, cy = self.cell(x, y)
+        reach = max(1, math.ceil(radius / self.cell_size))
+        candidates = [i for dx in range(-reach, reach + 1)
+                      for dy in range(-reach, reach + 1)
+                      for i in self.grid.get((cx + dx, cy + dy), ())]
+        if not candidates:
+            return None
+        candidates = np.array(candidates, dtype=np.intp)
+        dist = np.hypot(self.node_xy[candidates, 0] - x, self.node_xy[candidates, 1] - y)
+        best = np.argmin(dist)
+        if dist[best] >= radius:
+            return None
+        return int(candidates[best])
+
+    def nearest_edge(self, x, y, threshold):
+        # Model edge id of the closest edge within `threshold`, or None. The
+        # groups that may pass through the cursor are measured first; groups
+        # further out only when they could still beat the best of those.
+        if not self.edge_ids.size:
+            return None
+        if self.edge_grid is None:
+            self.build_edge_grid()
+        loose = np.fromiter(self.loose, dtype=np.int64, count=len(self.loose))
+        best, dist = self.closest(np.concatenate([self.edges_near(x, y, -math.inf, 0), loose]),
+                                  x, y)
+        reach = min(dist, threshold)
+        if reach > 0:
+            k, d = self.closest(self.edges_near(x, y, 0, reach), x, y)
+            if d < dist:
+                best, dist = k, d
+        if dist >= threshold:
+            return None
+        return best
+
+    def closest(self, ids, x, y):
+        # (model edge id, distance) of the edge in `ids` nearest to (x, y)
+        rows = self.slot[ids]
+        rows = rows[rows >= 0]
+        if rows.size == 0:
+            return None, math.inf
+        seg = self.segments[rows]
+        dist = segment_distance(seg[:, 0], seg[:, 1] - seg[:, 0], x, y)
+        best = np.argmin(dist)
+        return int(self.edge_ids[rows[best]]), float(dist[best])
+
+
+def segment_distance(a, line_vec, x, y):
+    # Distance from (x, y) to each segment from a to a + line_vec
+    point_vec = np.array([x, y]) - a
+    length_sq = np.einsum('ij,ij->i', line_vec, line_vec)
+    # Projection of point onto each segment, clamped to the segment
+    t = np.einsum('ij,ij->i', point_vec, line_vec) / np.where(length_sq > 0, length_sq, 1)
+    t = np.clip(t, 0, 1)
+    nearest = a + t[:, None] * line_vec
+    return np.hypot(nearest[:, 0] - x, nearest[:, 1] - y)
@@ -0,0 +1,112 @@
+import atexit
+import cProfile
+import json
+import os
+import time
+from collections import deque
+
+import numpy as np
+
+# Histogram bin edges in seconds, half a decade apart from 10 us to 100 s
+BIN_EDGES = 10.0 ** np.arange(-5, 2.5, 0.5)
+
+
+class Profiler:
+    # Opt-in instrumentation. wrap() replaces a method on an object with a
+    # timing wrapper that records into a rolling window per stage; while the
+    # profiler is off the wrapper only checks a flag and calls through.
+    # Turned on with the RAMSEY_PROFILE environment variable (1, or
+    # "cprofile" to also collect cProfile stats) or toggled at runtime.
+    def __init__(self, enabled=False, use_cprofile=False, path='ramsey_profile.json', window=512):
+        self.enabled = False
+        self.window = window
+        self.path = path
+        self.samples = {}                  # Stage name -> recent durations (s)
+        self.frames = deque(maxlen=window)  # Start times of recent frames
+        self.last_frame = 0.0
+        self.cprofile = cProfile.Profile() if use_cprofile else None
+        self.hud = None
+        self.used = False
+        atexit.register(self.dump)
+        if enabled:
+            self.toggle()
+
+    @classmethod
+    def from_env(cls):
+        mode = os.environ.get('RAMSEY_PROFILE', '')
+        return cls(enabled=mode not in ('', '0'), use_cprofile=mode == 'cprofile',
+                   path=os.environ.get('RAMSEY_PROFILE_OUT', 'ramsey_profile.json'))
+
+    def toggle(self):
+        self.enabled = not self.enabled
+        self.used = self.used or self.enabled
+        if self.cprofile is not None:
+            if self.enabled:
+                self.cprofile.enable()
+            else:
+                self.cprofile.disable()
+        self.refresh_hud()
+
+    def wrap(self, obj, attr, name=None, frame=False):
+        # `frame` marks stages that put a frame on screen; they drive the FPS
+        # counter and refresh the HUD text just before drawing
+        fn = getattr(obj, attr)
+        samples = self.samples.setdefault(name or attr, deque(maxlen=self.window))
+
+        def timed(*args, **kwargs):
+            if not self.enabled:
+                return fn(*args, **kwargs)
+            start = time.perf_counter()
+            if frame:
+                self.frames.append(start)
+                self.refresh_hud()
+            try:
+                return fn(*args, **kwargs)
+            finally:
+                elapsed = time.perf_counter() - start
+                samples.append(elapsed)
+                if frame:
+                    self.last_frame = elapsed
+
+        setattr(obj, attr, timed)
+
+    def stats(self, name):
+        runs = np.fromiter(self.samples[name], dtype=float)
+        p50, p95 = np.percentile(runs, [50, 95])
+        return {"count": int(runs.size), "p50_ms": p50 * 1000, "p95_ms": p95 * 1000,
+                "max_ms": runs.max() * 1000,
+                "histogram": np.histogram(runs, bins=BIN_EDGES)[0].tolist()}
+
+    def fps(self):
+        # Frames drawn during the last second
+        now = time.perf_counter()
+        return sum(1 for t in self.frames if now - t <= 1.0)
+
+    def refresh_hud(self, shown=4):
+        if self.hud is None:
+            return
+        if not self.enabled:
+            self.hud.set_text("")
+            return
+        lines = [f"Frame {self.last_frame * 1000:.1f} ms, {self.fps()} fps"]
+        stages = [(self.stats(name), name) for name, runs in self.samples.items() if runs]
+        stages.sort(key=lambda item: item[0]["p95_ms"], reverse=True)
+        for stat, name in stages[:shown]:
+            lines.append(f"{name}: {stat['p50_ms']:.1f} / {stat['p95_ms']:.1f} / "
+                         f"{stat['max_ms']:.1f} ms")
+        lines.append("(p50 / p95 / max)")
+        self.hud.set_text("\n".join(lines))
+
+    def dump(self):
+        # Write the rolling timings (and cProfile stats, if collected) once
+        if not self.used:
+            return
+        self.used = False
+        report = {"bin_edges_s": BIN_EDGES.tolist(),
+                  "stages": {name: self.stats(name)
+                             for name, runs in sorted(self.samples.items()) if runs}}
+        with open(self.path, 'w') as f:
+            json.dump(report, f, indent=2)
+        if self.cprofile is not None:
+            self.cprofile.disable()
+            self.cprofile.dump_stats(os.path.splitext(self.path)[0] + '.prof')
@@ -1,313 +1,101 @@
-import networkx as nx
-import matplotlib.pyplot as plt
-from matplotlib.widgets import Button, Slider, RadioButtons
-import numpy as np
-import random
+import argparse
+import multiprocessing
+import sys
 
-class GraphVisualizer:
-    def __init__(self):
-        # Create figure with a wider layout to accommodate info box
-        self.fig = plt.figure(figsize=(12, 8))
-        
-        # Create left area for info box (left 20% of figure)
-        self.info_ax = self.fig.add_axes([0.02, 0.15, 0.18, 0.83])
-        self.info_ax.axis('off')  # Hide axes for info text area
-        
-        # Create main graph area (right 80% of figure)
-        self.ax = self.fig.add_axes([0.25, 0.15, 0.73, 0.83])
-        
-        # Keep bottom part for controls
-        plt.subplots_adjust(bottom=0.15)
-        
-        self.G = nx.Graph()
-        self.pos = {}
-        self.num_vertices = 5  # Default number of vertices
-        self.graph_type = "Complete"
-        self.edge_colors = {}
-        self.edge_widths = {}  # Track edge widths for bold/normal states
-        self.colors = ['r', 'b']  # Red and blue coloring for edges
-        self.selected_vertex = None
-        self.cmd_pressed = False  # Track if command key is pressed
-        self.opt_pressed = False  # Track if option key is pressed
-        self.a_pressed = False    # Track if "a" key is pressed
-        self.dragging_vertex = None  # Track which vertex is being dragged
 
-        # Initialize controls
-        self.setup_controls()
-        self.create_graph()
-        self.draw_graph()
-        
-        # Register event handlers
-        self.fig.canvas.mpl_connect('button_press_event', self.on_click)
-        self.fig.canvas.mpl_connect('button_release_event', self.on_release)
-        self.fig.canvas.mpl_connect('motion_notify_event', self.on_motion)
-        self.fig.canvas.mpl_connect('key_press_event', self.on_key_press)
-        self.fig.canvas.mpl_connect('key_release_event', self.on_key_release)
-        
-    def setup_controls(self):
-        # Vertex count slider
-        vertex_slider_ax = plt.axes([0.2, 0.02, 0.65, 0.03])
-        self.vertex_slider = Slider(
-            ax=vertex_slider_ax,
-            label='Number of Vertices',
-            valmin=3,
-            valmax=20,
-            valinit=self.num_vertices,
-            valstep=1
-        )
-        self.vertex_slider.on_changed(self.update_num_vertices)
-        
-        # Buttons
-        gen_button_ax = plt.axes([0.7, 0.07, 0.2, 0.06])
-        self.gen_button = Button(gen_button_ax, 'Generate Graph')
-        self.gen_button.on_clicked(self.generate_new_graph)
-        
-        clear_button_ax = plt.axes([0.1, 0.07, 0.2, 0.06])
-        self.clear_button = Button(clear_button_ax, 'Clear')
-        self.clear_button.on_clicked(self.clear_graph)
-    
-    def create_graph(self):
-        self.G.clear()
-        self.edge_colors = {}
-        self.edge_widths = {}
-        
-        # Add vertices
-        for i in range(self.num_vertices):
-            self.G.add_node(i)
-        
-        # Create positions on a circle
-        self.pos = {}
-        for i in range(self.num_vertices):
-            angle = 2 * np.pi * i / self.num_vertices
-            self.pos[i] = (np.cos(angle), np.sin(angle))
-        
-        # Add edges based on graph type
-        for i in range(self.num_vertices):
-            for j in range(i+1, self.num_vertices):
-                self.G.add_edge(i, j)
-                color_idx = random.randint(0, len(self.colors)-1)
-                self.edge_colors[(i, j)] = self.colors[color_idx]
-                self.edge_widths[(i, j)] = 2  # Default width
-    
-    def draw_graph(self):
-        self.ax.clear()
-        self.info_ax.clear()
-        self.info_ax.axis('off')
-        self.edge_lines = {}  # Store line objects for edge detection
-        
-        # Draw edges with their colors
-        for u, v in self.G.edges():
-            edge = (u, v) if (u, v) in self.edge_colors else (v, u)
-            color = self.edge_colors.get(edge, 'k')
-            width = self.edge_widths.get(edge, 2)
-            
-            edge_x = [self.pos[u][0], self.pos[v][0]]
-            edge_y = [self.pos[u][1], self.pos[v][1]]
-            line = self.ax.plot(edge_x, edge_y, color=color, linewidth=width, picker=True, pickradius=5)[0]
-            
-            # Store the line object with its endpoints for later reference
-            self.edge_lines[line] = (u, v)
-        
-        # Draw nodes
-        for node, position in self.pos.items():
-            self.ax.scatter(position[0], position[1], s=300, color='lightgray', edgecolors='black', zorder=10)
-            self.ax.text(position[0], position[1], str(node), 
-                        fontsize=12, ha='center', va='center', zorder=11)
-        
-        # Set the limits and remove ticks
-        self.ax.set_xlim(-1.2, 1.2)
-        self.ax.set_ylim(-1.2, 1.2)
-        self.ax.set_aspect('equal')
-        self.ax.set_xticks([])
-        self.ax.set_yticks([])
-        
-        # Add status information to the left panel
-        info_text = (f"Graph Type: {self.graph_type}\n\n"
-                    f"Vertices: {self.num_vertices}\n\n"
-                    f"Edges: {self.G.number_of_edges()}\n\n"
-                    f"Controls:\n"
-                    f"Left-click edge: Change color\n\n"
-                    f"Right-click edge: Toggle bold\n\n"
-                    f"Shift + Left-click: Remove edge\n\n"
-                    f"Command + Left-click vertices: Add edge\n\n"
-                    f"a + Left-click graph: Add vertex\n\n"
-                    f"Option + Left-click vertex: Move Vertex")
-        self.info_ax.text(0.05, 0.95, info_text, va='top', ha='left', fontsize=11)
-        
-        self.fig.canvas.draw_idle()
-    
-    def on_click(self, event):
-        if event.inaxes != self.ax:
-            return
+def clique_pair(value):
+    # "S,T" for --avoid
+    sizes = [int(k) for k in value.split(',')]
+    if len(sizes) != 2:
+        raise argparse.ArgumentTypeError(f"expected two clique sizes S,T, got {value!r}")
+    return sizes
 
-        # "a" + click: Add new vertex at cursor position
-        if self.a_pressed and event.button == 1:
-            # Create a new vertex with the next available index
-            new_vertex_id = max(self.G.nodes()) + 1 if self.G.nodes() else 0
-            self.G.add_node(new_vertex_id)
-            self.pos[new_vertex_id] = (event.xdata, event.ydata)
-            self.num_vertices = len(self.G.nodes())
-            # Update the slider value without triggering its callback
-            self.vertex_slider.eventson = False
-            self.vertex_slider.set_val(self.num_vertices)
-            self.vertex_slider.eventson = True
-            self.draw_graph()
-            return
 
-        # Option-click vertex dragging
-        if self.opt_pressed:
-            for node, position in self.pos.items():
-                dist = np.sqrt((position[0] - event.xdata)**2 + 
-                            (position[1] - event.ydata)**2)
-                if dist < 0.2:  # Threshold for selecting vertex
-                    self.dragging_vertex = node
-                    return
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(
+        description="Interactive Graph Visualization for Ramsey Theory")
+    parser.add_argument('--open', default='ramsey_coloring.rmc',
+                        help="Coloring file the GUI loads at start (if it exists) and saves to")
+    commands = parser.add_subparsers(dest='command')
 
-        # Command-click vertex selection
-        if self.cmd_pressed:
-            # Find clicked vertex
-            for node, position in self.pos.items():
-                dist = np.sqrt((position[0] - event.xdata)**2 + 
-                            (position[1] - event.ydata)**2)
-                if dist < 0.2:  # Increased click radius for better vertex detection
-                    if self.selected_vertex is None:
-                        # First vertex selection
-                        self.selected_vertex = node
-                        self.draw_graph()
-                        # Highlight selected vertex
-                        self.ax.scatter(self.pos[node][0], self.pos[node][1],
-                                    s=400, color='yellow', alpha=0.5, zorder=5)
-                        self.fig.canvas.draw_idle()
-                    else:
-                        # Second vertex selection - create edge
-                        if self.selected_vertex != node:  # Prevent self-loops
-                            edge = tuple(sorted([self.selected_vertex, node]))
-                            if not self.G.has_edge(*edge):
-                                self.G.add_edge(*edge)
-                                self.edge_colors[edge] = self.colors[0]
-                                self.edge_widths[edge] = 2
-                        self.selected_vertex = None
-                        self.draw_graph()
-                    return   
+    batch = commands.add_parser(
+        'batch', help="Sample random colorings headless and stream JSONL results")
+    batch.add_argument('--n', type=int, required=True, help="Number of vertices")
+    batch.add_argument('--s', type=int, default=3, help="Red clique size")
+    batch.add_argument('--t', type=int, default=3, help="Blue clique size")
+    # float() first so counts like 1e6 are accepted
+    batch.add_argument('--samples', type=lambda x: int(float(x)), default=1000,
+                       help="Number of random colorings to check")
+    batch.add_argument('--seed', type=int, default=None)
+    batch.add_argument('--out', default='-', help="Output file, '-' for stdout")
+    batch.add_argument('--archive', default=None,
+                       help="Also append every witness to this binary archive (.rma)")
 
-        # Find the closest edge to the click point
-        closest_line = None
-        min_distance = float('inf')
-        
-        for line, (u, v) in self.edge_lines.items():
-            # Get line data
-            xdata = line.get_xdata()
-            ydata = line.get_ydata()
-            
-            # Calculate distance from point to line segment
-            p1 = np.array([xdata[0], ydata[0]])
-            p2 = np.array([xdata[1], ydata[1]])
-            p3 = np.array([event.xdata, event.ydata])
-            
-            # Vector calculations for distance
-            line_vec = p2 - p1
-            point_vec = p3 - p1
-            line_len = np.linalg.norm(line_vec)
-            line_unitvec = line_vec / line_len
-            
-            # Projection of point onto line
-            point_vec_scaled = point_vec / line_len
-            t = np.dot(line_unitvec, point_vec_scaled)
-            
-            # Clamp t to line segment
-            t = max(0, min(1, t))
-            
-            # Closest point on line segment
-            nearest = p1 + t * line_vec
-            
-            # Distance from point to line segment
-            distance = np.linalg.norm(nearest - p3)
-            
-            if distance < min_distance and distance < 0.1:  # Threshold for considering a click "on" the edge
-                min_distance = distance
-                closest_line = line
-        
-        if closest_line:
-            u, v = self.edge_lines[closest_line]
-            edge = (u, v)
-            
-             # Shift-click: Remove edge
-            if event.button == 1 and event.key == 'shift':
-                self.G.remove_edge(u, v)
-                if edge in self.edge_colors:
-                    del self.edge_colors[edge]
-                if edge in self.edge_widths:
-                    del self.edge_widths[edge]
-            # Left-click: Change color
-            elif event.button == 1:
-                current_color = self.edge_colors.get(edge, self.colors[0])
-                next_index = (self.colors.index(current_color) + 1) % len(self.colors)
-                self.edge_colors[edge] = self.colors[next_index]
-                
-            # Right-click: Toggle bold
-            elif event.button == 3:
-                current_width = self.edge_widths.get(edge, 2)
-                self.edge_widths[edge] = 4 if current_width <= 2 else 2
-                
-            self.draw_graph()
-    
-    def on_key_press(self, event):
-        if event.key == 'cmd' or event.key == 'control':  # Support both Mac and Windows
-            self.cmd_pressed = True
-        elif event.key == 'alt' or event.key == 'option':  # Support both Mac and Windows
-            self.opt_pressed = True
-        elif event.key == 'a':
-            self.a_pressed = True
+    estimate = commands.add_parser(
+        'estimate', help="Estimate the probability that a random coloring avoids the cliques")
+    estimate.add_argument('--n', type=int, required=True, help="Number of vertices (at most 64)")
+    estimate.add_argument('--s', type=int, default=3, help="Red clique size")
+    estimate.add_argument('--t', type=int, default=3, help="Blue clique size")
+    estimate.add_argument('--samples', type=lambda x: int(float(x)), default=1000000,
+                          help="Number of random colorings to draw")
+    estimate.add_argument('--batch', type=int, default=2000, help="Colorings per task")
+    estimate.add_argument('--processes', type=int, default=None,
+                          help="Worker processes (default: one per core)")
+    estimate.add_argument('--seed', type=int, default=None)
+    estimate.add_argument('--checkpoint', default=None,
+                          help="JSON file to save progress to and resume from")
+    estimate.add_argument('--out', default='-', help="Output file, '-' for stdout")
 
-    def on_key_release(self, event):
-        if event.key == 'cmd' or event.key == 'control':  # Support both Mac and Windows
-            self.cmd_pressed = False
-            # Only clear selection if we're deselecting command
-            if self.selected_vertex is not None:
-                self.selected_vertex = None
-                self.draw_graph()
-        elif event.key == 'alt' or event.key == 'option':  # Support both Mac and Windows
-            self.opt_pressed = False
-            self.dragging_vertex = None
-        elif event.key == 'a':
-            self.a_pressed = False
+    circulant = commands.add_parser(
+        'circulant', help="Search circulant colorings for a witness, or check a Paley coloring")
+    circulant.add_argument('--n', type=int, required=True, help="Number of vertices")
+    circulant.add_argument('--s', type=int, default=3, help="Red clique size")
+    circulant.add_argument('--t', type=int, default=3, help="Blue clique size")
+    circulant.add_argument('--paley', action='store_true',
+                           help="Only check the Paley coloring (n prime, n % 4 == 1)")
+    circulant.add_argument('--processes', type=int, default=None)
 
-    def on_release(self, event):
-        self.dragging_vertex = None
+    enumerate_ = commands.add_parser(
+        'enumerate', help="Write every 2-coloring of K_n up to isomorphism to an archive")
+    enumerate_.add_argument('--n', type=int, required=True, help="Number of vertices (at most 9)")
+    enumerate_.add_argument('--archive', required=True, help="Archive file (.rma)")
+    enumerate_.add_argument('--processes', type=int, default=None)
 
-    def on_motion(self, event):
-        if event.inaxes != self.ax:
-            return
-            
-        if self.dragging_vertex is not None and self.opt_pressed:
-            # Update vertex position
-            self.pos[self.dragging_vertex] = (event.xdata, event.ydata)
-            self.draw_graph()
+    scan = commands.add_parser(
+        'scan', help="Count, filter and export colorings in an archive without loading it")
+    scan.add_argument('archive', help="Archive file (.rma)")
+    scan.add_argument('--max-red', type=int, default=None,
+                      help="Keep records whose red score (e.g. clique number) is at most this")
+    scan.add_argument('--max-blue', type=int, default=None)
+    scan.add_argument('--avoid', type=clique_pair, default=None,
+                      metavar='S,T', help="Keep colorings with no red K_s and no blue K_t")
+    scan.add_argument('--out', default=None,
+                      help="Write the kept colorings to an archive (.rma) or graph6 file (.g6)")
 
-    def update_num_vertices(self, val):
-        new_count = int(val)
-        current_count = len(self.G.nodes())
-        
-        # Only recreate the graph if the slider was directly adjusted
-        if new_count != current_count:
-            self.num_vertices = new_count
-            self.create_graph()
-            self.draw_graph()
-    
-    def generate_new_graph(self, event):
-        self.create_graph()
-        self.draw_graph()
-    
-    def clear_graph(self, event):
-        self.G.clear()
-        self.edge_colors = {}
-        self.edge_widths = {}
-        self.draw_graph()
-    
-    def show(self):
-        plt.show()
+    convert = commands.add_parser(
+        'convert', help="Convert a coloring between .rmc, .g6 and .json")
+    convert.add_argument('source')
+    convert.add_argument('target')
+
+    bench = commands.add_parser(
+        'bench', help="Time the GUI and analysis hot paths headless on the Agg backend")
+    bench.add_argument('--sizes', type=lambda x: [int(n) for n in x.split(',')],
+                       default=None, help="Comma-separated vertex counts (default 5 to 1000)")
+    bench.add_argument('--repeat', type=int, default=5, help="Runs per measurement")
+    bench.add_argument('--timeout', type=float, default=120.0,
+                       help="Seconds allowed per vertex count")
+    bench.add_argument('--out', default='benchmark.json', help="JSON report file")
+    bench.add_argument('--baseline', default=None, help="Earlier report to compare against")
+    bench.add_argument('--tolerance', type=float, default=0.2,
+                       help="Relative change reported as faster/slower")
+    return parser.parse_args(argv)
+
+
+def run_gui(path):
+    # Matplotlib is only imported once the GUI is actually launched
+    import os
+    from visualizer import GraphVisualizer
 
-if __name__ == "__main__":
     print("Interactive Graph Visualization for Ramsey Theory")
     print("------------------------------------------------")
     print("Controls:")
@@ -316,6 +104,185 @@ if __name__ == "__main__":
     print("- Left-click on an edge to change its color")
     print("- Right-click on an edge to toggle bold appearance")
     print("- Clear the graph to start fresh")
-    
-    visualizer = GraphVisualizer()
-    visualizer.show()
\ No newline at end of file
+    print("- Search for a coloring with no red K_s and no blue K_t")
+
+    visualizer = GraphVisualizer(save_path=path)
+    if os.path.exists(path):
+        visualizer.load_file()
+    visualizer.show()
+
+
+def run_circulant(args):
+    # Prints one JSON record with the connection set and the coloring in
+    # edge-id order, as in batch witness records
+    import json
+    import time
+    from cache import ResultCache, witness_key
+    from constructions import (CirculantSearch, circulant_avoids, circulant_coloring,
+                               paley_set)
+    sizes = (args.s, args.t)
+    start = time.perf_counter()
+    cache = ResultCache.from_env()
+    cached = False
+    if args.paley:
+        try:
+            S = paley_set(args.n)
+        except ValueError as error:
+            sys.exit(f"circulant: {error}")
+        if not circulant_avoids(args.n, S, sizes):
+            S = None
+        checked = 1
+    else:
+        # The search is exhaustive, so both outcomes are cached
+        entry = cache.get(witness_key("circulant", args.n, sizes))
+        if entry is not None:
+            S = entry.get("connection_set")
+            checked = 0
+            cached = True
+        else:
+            search = CirculantSearch(args.n, sizes, processes=args.processes)
+            search.wait()
+            S = search.connection_set
+            checked = search.checked
+    found = S is not None
+    record = {"type": "witness" if found else "none", "n": args.n, "s": args.s, "t": args.t,
+              "sets_checked": checked, "elapsed": round(time.perf_counter() - start, 3)}
+    if cached:
+        record["cached"] = True
+    if found:
+        coloring = circulant_coloring(args.n, S)
+        entry = {"coloring": coloring, "connection_set": S}
+        if not cached:
+            cache.put(witness_key("witness", args.n, sizes), entry)
+            if not args.paley:
+                cache.put(witness_key("circulant", args.n, sizes), entry)
+        record["connection_set"] = S
+        record["coloring"] = "".join(map(str, coloring.tolist()))
+    elif not args.paley and not cached:
+        cache.put(witness_key("circulant", args.n, sizes), {"coloring": None})
+    print(json.dumps(record))
+
+
+def run_enumerate(args):
+    # Archive records: label is the class number, scores the largest red and
+    # blue cliques
+    from enumeration import ColoringEnumerator, coloring_of
+    from storage import ArchiveWriter
+    if args.n > 9:
+        sys.exit("enumerate: n is limited to 9")
+    enumerator = ColoringEnumerator(args.n, processes=args.processes)
+    enumerator.wait()
+    with ArchiveWriter(args.archive, args.n) as archive:
+        for index, (cert, red, blue) in enumerate(enumerator.results()):
+            archive.append(coloring_of(cert, args.n), label=index, scores=(red, blue))
+    print(f"{archive.count} colorings of K_{args.n} in {enumerator.elapsed():.1f}s")
+
+
+def run_scan(args):
+    # Streams the memory-mapped archive chunk by chunk
+    import numpy as np
+    from cliques import has_clique_batch, packed_rows
+    from coloring import batch_adjacency, edge_total
+    from storage import ArchiveWriter, open_archive, scan_archive, to_graph6, unpack_planes
+    n, num_colors, _ = open_archive(args.archive)
+    m = edge_total(n)
+    if args.avoid is not None and (n > 64 or num_colors != 2):
+        sys.exit("scan: --avoid needs 2-colorings with at most 64 vertices")
+    writer = text = None
+    if args.out is not None and not args.out.endswith('.g6'):
+        writer = ArchiveWriter(args.out, n, num_colors)
+    elif args.out is not None:
+        text = open(args.out, 'w')
+    total = kept = 0
+    try:
+        for _, records in scan_archive(args.archive):
+            total += len(records)
+            keep = np.ones(len(records), dtype=bool)
+            if args.max_red is not None:
+                keep &= records['scores'][:, 0] <= args.max_red
+            if args.max_blue is not None:
+                keep &= records['scores'][:, 1] <= args.max_blue
+            records = records[keep]
+            color, present = unpack_planes(records['planes'], m)
+            if args.avoid is not None and len(records):
+                red = batch_adjacency(n, (color == 0) & (present == 1))
+                blue = batch_adjacency(n, (color == 1) & (present == 1))
+                keep = ~has_clique_batch(packed_rows(red), args.avoid[0])
+                keep &= ~has_clique_batch(packed_rows(blue), args.avoid[1])
+                records, color, present = records[keep], color[keep], present[keep]
+            kept += len(records)
+            for record, c, p in zip(records, color, present):
+                if writer is not None:
+                    writer.append(c, p, label=record['label'], scores=record['scores'])
+                elif text is not None:
+                    text.write(to_graph6(n, (p == 1) & (c == 0)) + "\n")
+    finally:
+        for f in (writer, text):
+            if f is not None:
+                f.close()
+    print(f"{kept} of {total} colorings of K_{n} kept")
+
+
+def run_convert(args):
+    from storage import export_text, import_text, load_coloring, save_coloring
+    try:
+        if args.source.endswith('.rmc'):
+            model, pos = load_coloring(args.source)
+        else:
+            model, pos = import_text(args.source)
+    except (OSError, ValueError) as error:
+        sys.exit(f"convert: {error}")
+    if args.target.endswith('.rmc'):
+        save_coloring(args.target, model, pos)
+    else:
+        export_text(args.target, model, pos)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    if args.command == 'batch':
+        from batch import run_batch
+        from cache import ResultCache
+        out = sys.stdout if args.out == '-' else open(args.out, 'w')
+        try:
+            run_batch(args.n, (args.s, args.t), args.samples, out=out, seed=args.seed,
+                      cache=ResultCache.from_env(), archive=args.archive)
+        finally:
+            if out is not sys.stdout:
+                out.close()
+    elif args.command == 'estimate':
+        from cache import ResultCache
+        from estimate import run_estimate
+        out = sys.stdout if args.out == '-' else open(args.out, 'w')
+        try:
+            run_estimate(args.n, (args.s, args.t), args.samples, out=out, seed=args.seed,
+                         batch=args.batch, processes=args.processes, checkpoint=args.checkpoint,
+                         cache=ResultCache.from_env())
+        except ValueError as error:
+            sys.exit(f"estimate: {error}")
+        finally:
+            if out is not sys.stdout:
+                out.close()
+    elif args.command == 'circulant':
+        run_circulant(args)
+    elif args.command == 'enumerate':
+        run_enumerate(args)
+    elif args.command == 'scan':
+        run_scan(args)
+    elif args.command == 'convert':
+        run_convert(args)
+    elif args.command == 'bench':
+        import benchmark
+        sizes = args.sizes or benchmark.DEFAULT_SIZES
+        report = benchmark.run_benchmarks(sizes, repeat=args.repeat, timeout=args.timeout)
+        benchmark.write_report(report, args.out, args.repeat)
+        if args.baseline:
+            if benchmark.compare(report, args.baseline, tolerance=args.tolerance):
+                sys.exit(1)
+    else:
+        run_gui(args.open)
+
+
+if __name__ == "__main__":
+    multiprocessing.freeze_support()  # Needed for the search pool in frozen builds
+    main()
@@ -0,0 +1,400 @@
+import numpy as np
+from matplotlib.collections import LineCollection
+from matplotlib.colors import to_rgba
+from matplotlib.image import AxesImage
+
+from coloring import edge_total
+from density import accumulate, composite, edge_phase, sample_scale, segments_in_view
+
+
+def marker_size(n):
+    # Vertex marker area that shrinks once the circle gets crowded
+    return 300 if n <= 20 else max(4.0, 300 * (20 / n) ** 2)
+
+
+class GraphRenderer:
+    # Retained-mode renderer: every edge lives in one LineCollection and every
+    # vertex in one PathCollection. Edits patch the backing arrays in place and
+    # are pushed to the screen with a single blit over a cached background.
+    # When more than `lod_threshold` edges are in view, the edges are drawn as
+    # one density image instead (see density.py); zooming in far enough
+    # switches back to vector lines for the edges in view.
+    def __init__(self, ax, overlays=(), lod_threshold=10000, lod_budget=3e6, max_labels=60):
+        self.ax = ax
+        self.fig = ax.figure
+        self.canvas = self.fig.canvas
+        self.background = None
+        self.overlays = list(overlays)  # Extra animated artists (e.g. info text)
+        self.palette = np.empty((0, 4))
+
+        # Edge state, one row per drawn edge
+        self.edge_ids = np.empty(0, dtype=np.int64)   # row -> model edge id
+        self.slot = np.empty(0, dtype=np.intp)        # model edge id -> row, or -1
+        self.edge_nodes = np.empty((0, 2), dtype=np.intp)
+        self.segments = np.empty((0, 2, 2))
+        self.edge_rgba = np.empty((0, 4))
+        self.edge_lw = np.empty(0)
+        self.edge_color = np.empty(0, dtype=np.intp)  # Palette index per row
+        self.view = None  # Rows drawn as vectors when zoomed in, None for all
+
+        # Vertex state, one row per vertex
+        self.node_xy = np.empty((0, 2))
+        self.labels = []  # Only drawn up to max_labels vertices
+        self.max_labels = max_labels
+
+        # Density (level-of-detail) state: one ink plane per color over the view
+        self.lod_threshold = lod_threshold
+        self.lod_budget = lod_budget  # Samples per full rasterization
+        self.lod_max_pixels = 1024
+        self.lod = False
+        self.lod_dirty = False
+        self.lod_planes = None
+        self.lod_extent = None
+        self.lod_scale = 1.0
+        self.lod_image = AxesImage(ax, origin='lower', interpolation='nearest', zorder=0.9,
+                                   animated=True, visible=False)
+        ax.add_image(self.lod_image)
+
+        self.glow_ids = np.empty(0, dtype=np.int64)
+        self.glow_collection = LineCollection([], zorder=0.5, colors='gold', linewidths=8,
+                                              alpha=0.45, animated=True)
+        ax.add_collection(self.glow_collection)
+        self.edge_collection = LineCollection([], zorder=1, animated=True)
+        ax.add_collection(self.edge_collection)
+        self.highlight = ax.scatter([], [], s=400, color='yellow', alpha=0.5,
+                                    zorder=5, animated=True)
+        self.node_collection = ax.scatter([], [], s=300, color='lightgray',
+                                          edgecolors='black', zorder=10, animated=True)
+        self.node_collection.set_cmap('YlOrRd')
+        self.node_values = np.zeros(0)
+        # Vertex outlines: black, or a thick ring in a clique's color
+        self.outline_width = self.node_collection.get_linewidths()[0]
+        self.node_edge = np.empty((0, 4))
+        self.node_edge_width = np.empty(0)
+
+        # Drag layer: while a vertex is dragged, everything else is cached in
+        # drag_background and frames only redraw these artists on top of it
+        self.drag_vertex = None
+        self.drag_rows = np.empty(0, dtype=np.intp)       # Incident edge rows
+        self.drag_glow_rows = np.empty(0, dtype=np.intp)
+        self.drag_background = None
+        self.drag_glow = LineCollection([], zorder=0.5, colors='gold', linewidths=8,
+                                        alpha=0.45, animated=True)
+        ax.add_collection(self.drag_glow)
+        self.drag_edges = LineCollection([], zorder=1, animated=True)
+        ax.add_collection(self.drag_edges)
+        self.drag_node = ax.scatter([], [], s=300, color='lightgray', edgecolors='black',
+                                    zorder=10, animated=True)
+        self.drag_node.set_cmap('YlOrRd')
+
+        self.canvas.mpl_connect('draw_event', self.on_draw)
+        ax.callbacks.connect('xlim_changed', self.on_view_changed)
+        ax.callbacks.connect('ylim_changed', self.on_view_changed)
+
+    def sync(self, model, pos):
+        # Full rebuild of the backing arrays; only needed when the graph
+        # structure changes (new graph, vertex added, edge added)
+        n = model.n
+        shown = n if n <= self.max_labels else 0
+        if len(self.labels) != shown:
+            for label in self.labels:
+                label.remove()
+            self.labels = [self.ax.text(0, 0, str(node), fontsize=12, ha='center',
+                                        va='center', zorder=11, animated=True)
+                           for node in range(shown)]
+        self.node_xy = np.array([pos[node] for node in range(n)], dtype=float).reshape(-1, 2)
+        for label, xy in zip(self.labels, self.node_xy):
+            label.set_position(xy)
+
+        self.palette = np.array([to_rgba(c) for c in model.colors])
+        ids, u, v = model.edge_list()
+        self.edge_ids = ids
+        self.slot = np.full(edge_total(n), -1, dtype=np.intp)
+        self.slot[ids] = np.arange(ids.size)
+        self.edge_nodes = np.column_stack([u, v]).astype(np.intp)
+        self.segments = self.node_xy[self.edge_nodes]
+        self.edge_rgba = self.palette[model.color[ids]]
+        self.edge_lw = model.width[ids].astype(float)
+        self.edge_color = model.color[ids].astype(np.intp)
+
+        size = marker_size(n)
+        for markers, scale in ((self.node_collection, 1), (self.drag_node, 1),
+                               (self.highlight, 4 / 3)):
+            markers.set_sizes([size * scale])
+        self.node_collection.set_offsets(self.node_xy)
+        if len(self.node_edge) != n:
+            self.set_outline([])
+        self.update_lod()
+        self.push_glow()
+
+    def update_lod(self):
+        # Choose between vector lines and the density image for the current
+        # view, and redraw the edges accordingly
+        self.lod_dirty = False
+        self.view = None
+        lod = False
+        if self.edge_ids.size > self.lod_threshold:
+            (x0, x1), (y0, y1) = self.ax.get_xlim(), self.ax.get_ylim()
+            lo = self.node_xy.min(axis=0)
+            hi = self.node_xy.max(axis=0)
+            if x0 <= lo[0] and hi[0] <= x1 and y0 <= lo[1] and hi[1] <= y1:
+                # Every vertex, and so every edge, is in view
+                rows = np.arange(self.edge_ids.size)
+            else:
+                rows = np.flatnonzero(segments_in_view(self.segments, (x0, x1, y0, y1)))
+            lod = rows.size > self.lod_threshold
+            if not lod and rows.size < self.edge_ids.size:
+                self.view = rows
+        self.lod = lod
+        self.edge_collection.set_visible(not lod)
+        self.lod_image.set_visible(lod)
+        if lod:
+            self.rasterize()
+            self.edge_collection.set_segments([])  # Free the hidden lines
+        else:
+            self.lod_planes = None
+        self.push_edges()
+
+    def lod_shape(self):
+        bbox = self.ax.bbox
+        return (max(1, min(self.lod_max_pixels, int(bbox.height))),
+                max(1, min(self.lod_max_pixels, int(bbox.width))))
+
+    def rasterize(self):
+        # Full rasterization of every edge over the current view
+        (x0, x1), (y0, y1) = self.ax.get_xlim(), self.ax.get_ylim()
+        self.lod_extent = (x0, x1, y0, y1)
+        shape = self.lod_shape()
+        self.lod_scale = sample_scale(self.segments, self.lod_extent, shape, self.lod_budget)
+        self.lod_planes = np.zeros((len(self.palette),) + shape)
+        self.lod_edges(slice(None), 1)
+        self.lod_image.set_extent(self.lod_extent)
+
+    def lod_edges(self, rows, sign):
+        # Add or remove some edges' ink, with the sampling of the last full
+        # rasterization so removals cancel exactly
+        accumulate(self.lod_planes, self.segments[rows], self.edge_color[rows],
+                   self.edge_lw[rows], edge_phase(self.edge_ids[rows]),
+                   self.lod_extent, self.lod_scale, sign)
+
+    def push_edges(self):
+        if self.lod:
+            self.lod_image.set_data(composite(self.lod_planes, self.palette))
+            return
+        rows = slice(None) if self.view is None else self.view
+        self.edge_collection.set_segments(self.segments[rows])
+        self.edge_collection.set_color(self.edge_rgba[rows])
+        self.edge_collection.set_linewidth(self.edge_lw[rows])
+
+    def push_all(self):
+        self.node_collection.set_offsets(self.node_xy)
+        self.push_edges()
+        self.push_glow()
+
+    def set_edge_style(self, k, color, width):
+        row = self.slot[k]
+        if row < 0:
+            return
+        if self.lod:
+            self.lod_edges([row], -1)
+        self.edge_rgba[row] = self.palette[color]
+        self.edge_lw[row] = width
+        self.edge_color[row] = color
+        if self.lod:
+            self.lod_edges([row], 1)
+            self.push_edges()
+        else:
+            rows = slice(None) if self.view is None else self.view
+            self.edge_collection.set_color(self.edge_rgba[rows])
+            self.edge_collection.set_linewidth(self.edge_lw[rows])
+
+    def remove_edge(self, k):
+        row = self.slot[k]
+        if row < 0:
+            return
+        if self.lod:
+            self.lod_edges([row], -1)
+        # Swap-remove: move the last edge into the freed row so rows stay dense
+        last = self.edge_ids.size - 1
+        if row != last:
+            for arr in (self.edge_ids, self.edge_nodes, self.segments, self.edge_rgba,
+                        self.edge_lw, self.edge_color):
+                arr[row] = arr[last]
+            self.slot[self.edge_ids[row]] = row
+        self.slot[k] = -1
+        self.edge_ids = self.edge_ids[:last]
+        self.edge_nodes = self.edge_nodes[:last]
+        self.segments = self.segments[:last]
+        self.edge_rgba = self.edge_rgba[:last]
+        self.edge_lw = self.edge_lw[:last]
+        self.edge_color = self.edge_color[:last]
+        if self.view is not None:
+            self.update_lod()  # Row numbers in the view have moved
+        else:
+            self.push_edges()
+        self.push_glow()
+
+    def set_glow(self, ids):
+        # Draw a halo under the given edges (e.g. those in a monochromatic clique)
+        self.glow_ids = np.asarray(ids, dtype=np.int64)
+        self.push_glow()
+
+    def glow_rows(self):
+        rows = self.slot[self.glow_ids[self.glow_ids < self.slot.size]]
+        return rows[rows >= 0]
+
+    def push_glow(self):
+        self.glow_collection.set_segments(self.segments[self.glow_rows()])
+
+    def set_node_values(self, values):
+        # Heatmap fill for the vertices, e.g. monochromatic triangles per vertex
+        values = self.node_values = np.asarray(values, dtype=float)
+        self.node_collection.set_array(values)
+        # Stop short of the darkest shades so the labels stay readable
+        self.node_collection.set_clim(0, 1.5 * max(1.0, values.max(initial=0)))
+
+    def set_outline(self, groups):
+        # Ring the vertices of each (vertices, color) group, e.g. one maximum
+        # clique per color; a later group wins where they overlap
+        n = self.node_xy.shape[0]
+        self.node_edge = np.tile(to_rgba('black'), (n, 1))
+        self.node_edge_width = np.full(n, self.outline_width)
+        for vertices, color in groups:
+            vertices = [v for v in vertices if v < n]
+            self.node_edge[vertices] = to_rgba(color)
+            self.node_edge_width[vertices] = 3 * self.outline_width
+        self.node_collection.set_edgecolor(self.node_edge)
+        self.node_collection.set_linewidth(self.node_edge_width)
+
+    def set_highlight(self, xy):
+        self.highlight.set_offsets(np.empty((0, 2)) if xy is None else [xy])
+
+    def move_vertex(self, v, xy):
+        # Patch vertex v and the segments of its incident edges in place
+        self.node_xy[v] = xy
+        if self.labels:
+            self.labels[v].set_position(xy)
+        rows = self.drag_rows if v == self.drag_vertex else self.incident_rows(v)
+        if self.lod:
+            self.lod_edges(rows, -1)
+        self.segments[rows] = self.node_xy[self.edge_nodes[rows]]
+        if self.lod:
+            self.lod_edges(rows, 1)
+        if self.drag_vertex is None:
+            self.push_all()
+
+    def incident_rows(self, v):
+        return np.flatnonzero((self.edge_nodes == v).any(axis=1))
+
+    def begin_drag(self, v):
+        self.drag_vertex = v
+        self.drag_rows = self.incident_rows(v)
+        self.split_drag()
+
+    def split_drag(self):
+        # Paint the graph without the dragged vertex and its edges once and
+        # cache it; the full artists are restored right away so an ordinary
+        # blit during the drag still shows everything
+        # (In density mode the image is patched and blitted as a whole instead.)
+        self.drag_background = None
+        if self.background is None or not self.canvas.supports_blit or self.lod:
+            return
+        v = self.drag_vertex
+        rows = self.drag_rows
+        incident = np.zeros(self.edge_ids.size, dtype=bool)
+        incident[rows] = True
+        still = ~incident
+        if self.view is not None:
+            still &= np.isin(np.arange(self.edge_ids.size), self.view)
+        glow = self.glow_rows()
+        self.drag_glow_rows = glow[incident[glow]]
+        others = np.arange(self.node_xy.shape[0]) != v
+        label = self.labels[v] if self.labels else None
+
+        self.edge_collection.set_segments(self.segments[still])
+        self.edge_collection.set_color(self.edge_rgba[still])
+        self.edge_collection.set_linewidth(self.edge_lw[still])
+        self.glow_collection.set_segments(self.segments[glow[~incident[glow]]])
+        self.node_collection.set_offsets(self.node_xy[others])
+        self.node_collection.set_array(self.node_values[others])
+        self.node_collection.set_edgecolor(self.node_edge[others])
+        self.node_collection.set_linewidth(self.node_edge_width[others])
+        if label is not None:
+            label.set_visible(False)
+        self.canvas.restore_region(self.background)
+        self.draw_artists()
+        self.drag_background = self.canvas.copy_from_bbox(self.fig.bbox)
+
+        if label is not None:
+            label.set_visible(True)
+        self.node_collection.set_array(self.node_values)
+        self.node_collection.set_edgecolor(self.node_edge)
+        self.node_collection.set_linewidth(self.node_edge_width)
+        self.push_all()
+        self.drag_edges.set_color(self.edge_rgba[rows])
+        self.drag_edges.set_linewidth(self.edge_lw[rows])
+        self.drag_node.set_array(self.node_values[[v]])
+        self.drag_node.set_edgecolor(self.node_edge[[v]])
+        self.drag_node.set_linewidth(self.node_edge_width[[v]])
+        self.drag_node.set_clim(*self.node_collection.get_clim())
+
+    def drag_frame(self):
+        # Redraw only the dragged vertex and its incident edges
+        if self.drag_background is None:
+            self.split_drag()
+        if self.drag_background is None:
+            self.push_all()
+            self.blit()
+            return
+        v = self.drag_vertex
+        self.drag_glow.set_segments(self.segments[self.drag_glow_rows])
+        self.drag_edges.set_segments(self.segments[self.drag_rows])
+        self.drag_node.set_offsets(self.node_xy[[v]])
+        self.canvas.restore_region(self.drag_background)
+        for artist in (self.drag_glow, self.drag_edges, self.drag_node, *self.labels[v:v + 1]):
+            self.fig.draw_artist(artist)
+        self.canvas.blit(self.fig.bbox)
+
+    def end_drag(self):
+        self.drag_vertex = None
+        self.drag_background = None
+        if self.view is not None:
+            self.update_lod()  # Moved edges may have entered or left the view
+        self.push_all()
+        self.blit()
+
+    def frame(self):
+        # One scheduled frame: the cheap drag path while dragging, else a blit
+        if self.drag_vertex is not None:
+            self.drag_frame()
+        else:
+            self.blit()
+
+    def artists(self):
+        return [self.lod_image, self.glow_collection, self.edge_collection, self.highlight,
+                self.node_collection, *self.labels, *self.overlays]
+
+    def draw_artists(self):
+        for artist in self.artists():
+            self.fig.draw_artist(artist)
+
+    def on_view_changed(self, ax):
+        # Zoom or pan; the edges are redrawn for the new view on the next draw
+        self.lod_dirty = True
+
+    def on_draw(self, event):
+        # A full draw skips animated artists, so grab the clean background
+        # and paint the graph on top of it
+        if self.lod_dirty or (self.lod and self.lod_planes.shape[1:] != self.lod_shape()):
+            self.update_lod()
+        self.background = self.canvas.copy_from_bbox(self.fig.bbox)
+        self.drag_background = None  # Rebuilt by the next drag frame
+        self.draw_artists()
+
+    def blit(self):
+        if self.background is None or not self.canvas.supports_blit:
+            self.canvas.draw_idle()
+            return
+        self.canvas.restore_region(self.background)
+        self.draw_artists()
+        self.canvas.blit(self.fig.bbox)
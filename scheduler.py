@@ -0,0 +1,34 @@
+class FrameScheduler:
+    # Coalesces bursts of interaction events into frames. Event handlers only
+    # queue an update under a key (a newer update replaces an older one with
+    # the same key), and a canvas timer applies whatever is pending and draws
+    # a single frame at most once per interval.
+    def __init__(self, canvas, draw, interval=16):
+        self.draw = draw
+        self.pending = {}
+        self.running = False
+        self.timer = canvas.new_timer(interval=interval)
+        self.timer.add_callback(self.frame)
+
+    def request(self, key, update):
+        self.pending[key] = update
+        if not self.running:
+            self.running = True
+            self.timer.start()
+
+    def frame(self):
+        if not self.pending:
+            # Nothing changed since the last frame, so let the timer sleep
+            self.running = False
+            self.timer.stop()
+            return
+        updates = self.pending
+        self.pending = {}
+        for update in updates.values():
+            update()
+        self.draw()
+
+    def flush(self):
+        # Commit pending updates now, e.g. on mouse release
+        if self.pending:
+            self.frame()
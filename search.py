@@ -0,0 +1,137 @@
+import math
+import multiprocessing as mp
+import random
+import threading
+
+from cliques import count_cliques
+
+_stop = None  # Early-stop flag shared by every worker in the pool
+
+
+def _init_worker(stop):
+    global _stop
+    _stop = stop
+
+
+def stop_requested():
+    # For tasks running in a PoolSearch: whether another one found a witness
+    return _stop is not None and _stop.is_set()
+
+
+def request_stop():
+    # For tasks running in a PoolSearch: stop the others
+    if _stop is not None:
+        _stop.set()
+
+
+def anneal(n, sizes, seed, steps, t_start=2.0, t_end=0.05):
+    # Simulated annealing over colorings of K_n with one color per entry of
+    # `sizes`. The score is the number of K_{sizes[c]} in each color c;
+    # recoloring edge (u, v) only changes cliques through it, so each move
+    # is scored from the common neighbourhoods of u and v instead of a full
+    # recount.
+    rng = random.Random(seed)
+    k = len(sizes)
+    everyone = (1 << n) - 1
+    adj = [[0] * n for _ in range(k)]
+    for i in range(n):
+        for j in range(i + 1, n):
+            c = int(rng.random() * k)
+            adj[c][i] |= 1 << j
+            adj[c][j] |= 1 << i
+    edges = [(i, j) for j in range(n) for i in range(j)]  # Edge id order
+    score = sum(count_cliques(adj[c], everyone, sizes[c]) for c in range(k))
+
+    for step in range(steps):
+        if score == 0:
+            break
+        if step % 1000 == 0 and stop_requested():
+            return None
+        temperature = t_start * (t_end / t_start) ** (step / steps)
+        i, j = edges[rng.randrange(len(edges))]
+        c = next(c for c in range(k) if adj[c][i] >> j & 1)
+        d = 1 - c if k == 2 else (c + 1 + rng.randrange(k - 1)) % k
+        same, other = adj[c], adj[d]
+        delta = (count_cliques(other, other[i] & other[j], sizes[d] - 2)
+                 - count_cliques(same, same[i] & same[j], sizes[c] - 2))
+        if delta <= 0 or rng.random() < math.exp(-delta / temperature):
+            bit_i, bit_j = 1 << i, 1 << j
+            same[i] ^= bit_j
+            same[j] ^= bit_i
+            other[i] ^= bit_j
+            other[j] ^= bit_i
+            score += delta
+    # Color index per edge id, as in coloring.edge_id
+    return score, [next(c for c in range(k) if adj[c][i] >> j & 1) for i, j in edges]
+
+
+def run_restart(n, sizes, seed, steps):
+    result = anneal(n, sizes, seed, steps)
+    if result is not None and result[0] == 0:
+        request_stop()
+    return result
+
+
+class PoolSearch:
+    # Runs (function, args) tasks on a process pool until one of them yields
+    # a witness, which stops the rest. Tasks poll stop_requested() and call
+    # request_stop() themselves, so the others stop without waiting for the
+    # result to travel back. Subclasses set up their own state before calling
+    # __init__ and fill in record(), which sees each task's result.
+    def __init__(self, n, sizes, tasks, processes=None):
+        self.n = n
+        self.sizes = tuple(sizes)
+        self.tasks = len(tasks)
+        self.finished = 0
+        self.witness = None
+        self.settled = threading.Event()  # Set once done() holds
+
+        self.stop = mp.Event()
+        self.pool = mp.Pool(processes, initializer=_init_worker, initargs=(self.stop,))
+        for function, args in tasks:
+            self.pool.apply_async(function, args, callback=self.collect)
+        self.pool.close()
+
+    def record(self, result):
+        raise NotImplementedError
+
+    def collect(self, result):
+        # Runs on the pool's result thread as each task returns
+        self.finished += 1
+        if result is not None:
+            self.record(result)
+        if self.witness is not None:
+            self.stop.set()
+        if self.done():
+            self.settled.set()
+
+    def done(self):
+        return self.witness is not None or self.finished >= self.tasks
+
+    def wait(self, timeout=None):
+        # The workers' stop flag is set before collect() has stored the
+        # witness, so this waits for collect() itself
+        self.settled.wait(timeout)
+        return self.witness
+
+    def cancel(self):
+        self.stop.set()
+        self.pool.terminate()
+
+
+class RamseySearch(PoolSearch):
+    # Runs many independent annealing restarts across a process pool, looking
+    # for a coloring of K_n with no red K_s and no blue K_t (or, with more
+    # sizes, no K_{sizes[c]} in any color c), i.e. a witness for
+    # R(s, t, ...) > n. The first worker to succeed stops the others.
+    def __init__(self, n, sizes, restarts=64, steps=200000, processes=None, seed=None):
+        self.best = None  # (score, coloring) with the lowest score so far
+        seed = random.randrange(1 << 30) if seed is None else seed
+        tasks = [(run_restart, (n, tuple(sizes), seed + k, steps)) for k in range(restarts)]
+        super().__init__(n, sizes, tasks, processes)
+
+    def record(self, result):
+        if self.best is None or result[0] < self.best[0]:
+            self.best = result
+        if result[0] == 0 and self.witness is None:
+            self.witness = result[1]  # First coloring with score 0
@@ -0,0 +1,244 @@
+import json
+import os
+import struct
+
+import numpy as np
+
+from coloring import ColoringModel, edge_ends_array, edge_total
+
+PALETTE = ['r', 'b', 'g', 'm', 'c', 'y']  # Matplotlib colors for loaded color indices
+COLORING_MAGIC = b"RMC1"
+ARCHIVE_MAGIC = b"RMA1"
+ARCHIVE_HEADER = struct.Struct('<4sIHH')  # Magic, n, colors, reserved
+
+
+# Colorings are stored as bit planes: plane c has one bit per vertex pair,
+# set where the edge is present with color c, in coloring.edge_id order.
+# That is the column-by-column upper triangle graph6 uses, and bits are
+# packed big-endian like graph6, so plane 0 of a 2-coloring is the red
+# graph's graph6 body in binary.
+#
+# A coloring file (.rmc) is the magic, n as in graph6, the number of
+# colors, a flags byte, the planes, then optionally a plane of bold edges
+# and float32 vertex positions. An archive (.rma) is a fixed header and a
+# stream of fixed-size records (a label, one score per color, the planes),
+# so it can be appended to while a run is going and read back through
+# numpy.memmap without loading it.
+
+FLAG_WIDTHS = 1
+FLAG_POSITIONS = 2
+
+
+def graph6_size(n):
+    # N(n) from the graph6 format
+    if n < 63:
+        return bytes([n + 63])
+    if n < 258048:
+        return bytes([126] + [(n >> s & 63) + 63 for s in (12, 6, 0)])
+    return bytes([126, 126] + [(n >> s & 63) + 63 for s in (30, 24, 18, 12, 6, 0)])
+
+
+def read_graph6_size(data, offset=0):
+    # (n, offset after it)
+    if data[offset] != 126:
+        return data[offset] - 63, offset + 1
+    if data[offset + 1] != 126:
+        digits, offset = data[offset + 1:offset + 4], offset + 4
+    else:
+        digits, offset = data[offset + 2:offset + 8], offset + 8
+    n = 0
+    for d in digits:
+        n = n << 6 | (d - 63)
+    return n, offset
+
+
+def pack_planes(color, present, num_colors):
+    # (num_colors, ceil(m / 8)) bytes
+    on = np.asarray(present, dtype=bool)
+    color = np.asarray(color)
+    return np.packbits(np.stack([on & (color == c) for c in range(num_colors)]), axis=-1)
+
+
+def unpack_planes(planes, m):
+    # (color, present) per edge id from planes of shape (..., colors, bytes)
+    bits = np.unpackbits(planes, axis=-1, count=m).astype(bool)
+    present = bits.any(axis=-2)
+    color = np.argmax(bits, axis=-2).astype(np.uint8)
+    return color, present.astype(np.uint8)
+
+
+def save_coloring(path, model, pos=None):
+    k = len(model.colors)
+    bold = model.width > 2
+    flags = (FLAG_WIDTHS if bold.any() else 0) | (FLAG_POSITIONS if pos is not None else 0)
+    with open(path, 'wb') as f:
+        f.write(COLORING_MAGIC + graph6_size(model.n) + bytes([k, flags]))
+        f.write(pack_planes(model.color, model.present, k).tobytes())
+        if flags & FLAG_WIDTHS:
+            f.write(np.packbits(bold).tobytes())
+        if flags & FLAG_POSITIONS:
+            f.write(np.asarray([pos[i] for i in range(model.n)], dtype='<f4').tobytes())
+
+
+def load_coloring(path, palette=PALETTE):
+    # (model, positions as a dict, or None if the file has none)
+    with open(path, 'rb') as f:
+        data = f.read()
+    if data[:4] != COLORING_MAGIC:
+        raise ValueError(f"{path} is not a coloring file")
+    n, offset = read_graph6_size(data, 4)
+    k, flags = data[offset], data[offset + 1]
+    offset += 2
+    m = edge_total(n)
+    size = (m + 7) // 8
+    planes = np.frombuffer(data, dtype=np.uint8, count=k * size, offset=offset).reshape(k, size)
+    offset += k * size
+    model = ColoringModel(n, palette[:k])
+    model.color[:], model.present[:] = unpack_planes(planes, m)
+    if flags & FLAG_WIDTHS:
+        bold = np.unpackbits(np.frombuffer(data, dtype=np.uint8, count=size, offset=offset),
+                             count=m)
+        model.width[:] = np.where(bold, 4, 2)
+        offset += size
+    pos = None
+    if flags & FLAG_POSITIONS:
+        xy = np.frombuffer(data, dtype='<f4', count=2 * n, offset=offset).reshape(n, 2)
+        pos = dict(enumerate(map(tuple, xy.astype(float).tolist())))
+    return model, pos
+
+
+def to_graph6(n, bits):
+    # graph6 line for the graph with edge bits in edge-id order
+    bits = np.concatenate([np.asarray(bits, dtype=np.uint8), np.zeros(-len(bits) % 6, np.uint8)])
+    groups = bits.reshape(-1, 6) @ (1 << np.arange(5, -1, -1)) + 63
+    return (graph6_size(n) + bytes(groups.astype(np.uint8).tolist())).decode('ascii')
+
+
+def from_graph6(line):
+    # (n, edge bits in edge-id order)
+    data = line.strip().encode('ascii')
+    if data.startswith(b'>>graph6<<'):
+        data = data[10:]
+    n, offset = read_graph6_size(data)
+    groups = np.frombuffer(data[offset:], dtype=np.uint8) - 63
+    bits = np.unpackbits(groups[:, None], axis=1)[:, 2:].ravel()
+    return n, bits[:edge_total(n)]
+
+
+def export_text(path, model, pos=None):
+    # graph6 (one line per color class) or JSON, by file extension
+    if path.endswith('.g6'):
+        with open(path, 'w') as f:
+            for c in range(len(model.colors)):
+                f.write(to_graph6(model.n, (model.present == 1) & (model.color == c)) + "\n")
+        return
+    ids = np.flatnonzero(model.present)
+    u, v = edge_ends_array(ids)
+    document = {"n": model.n, "colors": list(model.colors),
+                "edges": [[a, b, c, w] for a, b, c, w in zip(
+                    u.tolist(), v.tolist(), model.color[ids].tolist(), model.width[ids].tolist())]}
+    if pos is not None:
+        document["positions"] = [list(pos[i]) for i in range(model.n)]
+    with open(path, 'w') as f:
+        json.dump(document, f)
+
+
+def import_text(path, palette=PALETTE):
+    # Reverse of export_text. A graph6 file with a single line is read as
+    # the red graph of a complete 2-coloring, the usual way Ramsey
+    # colorings are published.
+    if path.endswith('.g6'):
+        with open(path) as f:
+            lines = [line for line in f if line.strip()]
+        if not lines:
+            raise ValueError(f"{path} has no graphs")
+        graphs = [from_graph6(line) for line in lines]
+        n = graphs[0][0]
+        model = ColoringModel(n, palette[:max(2, len(graphs))])
+        if len(graphs) == 1:
+            model.load(np.where(graphs[0][1], 0, 1))
+        else:
+            for c, (_, bits) in enumerate(graphs):
+                model.present[bits == 1] = 1
+                model.color[bits == 1] = c
+        return model, None
+    with open(path) as f:
+        document = json.load(f)
+    model = ColoringModel(document["n"], document.get("colors", palette[:2]))
+    for u, v, c, w in document["edges"]:
+        model.add_edge(u, v, c, w)
+    pos = document.get("positions")
+    return model, None if pos is None else dict(enumerate(map(tuple, pos)))
+
+
+def record_dtype(n, num_colors):
+    return np.dtype([('label', '<i8'), ('scores', '<i2', (num_colors,)),
+                     ('planes', 'u1', (num_colors, (edge_total(n) + 7) // 8))])
+
+
+class ArchiveWriter:
+    # Appends colorings of K_n to an archive, creating it if needed. Every
+    # record is written whole, so a reader only ever misses a torn last one.
+    def __init__(self, path, n, num_colors=2):
+        self.n = n
+        self.num_colors = num_colors
+        self.dtype = record_dtype(n, num_colors)
+        exists = os.path.exists(path) and os.path.getsize(path) > 0
+        if exists:
+            header = read_archive_header(path)
+            if header != (n, num_colors):
+                raise ValueError(f"{path} holds K_{header[0]} colorings with {header[1]} colors")
+        self.file = open(path, 'ab')
+        if not exists:
+            self.file.write(ARCHIVE_HEADER.pack(ARCHIVE_MAGIC, n, num_colors, 0))
+        self.count = 0
+
+    def append(self, color, present=None, label=0, scores=None):
+        # `color` is a color index per edge id; `scores` one int per color,
+        # e.g. the clique numbers (-1 when unknown)
+        record = np.zeros(1, dtype=self.dtype)
+        record['label'] = label
+        record['scores'] = -1 if scores is None else scores
+        present = np.ones(len(color), dtype=bool) if present is None else present
+        record['planes'][0] = pack_planes(color, present, self.num_colors)
+        self.file.write(record.tobytes())
+        self.count += 1
+
+    def flush(self):
+        self.file.flush()
+
+    def close(self):
+        self.file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def read_archive_header(path):
+    with open(path, 'rb') as f:
+        magic, n, num_colors, _ = ARCHIVE_HEADER.unpack(f.read(ARCHIVE_HEADER.size))
+    if magic != ARCHIVE_MAGIC:
+        raise ValueError(f"{path} is not a coloring archive")
+    return n, num_colors
+
+
+def open_archive(path):
+    # (n, number of colors, records) with the records memory-mapped read-only
+    n, num_colors = read_archive_header(path)
+    dtype = record_dtype(n, num_colors)
+    count = (os.path.getsize(path) - ARCHIVE_HEADER.size) // dtype.itemsize
+    if count == 0:
+        return n, num_colors, np.zeros(0, dtype=dtype)
+    records = np.memmap(path, dtype=dtype, mode='r', offset=ARCHIVE_HEADER.size, shape=(count,))
+    return n, num_colors, records
+
+
+def scan_archive(path, chunk=65536):
+    # Yields (first index, records) in chunks; each chunk is a view into
+    # the memory map, so only the pages being scanned are read
+    n, num_colors, records = open_archive(path)
+    for start in range(0, len(records), chunk):
+        yield start, records[start:start + chunk]
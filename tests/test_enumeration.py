@@ -0,0 +1,45 @@
+import random
+
+import pytest
+
+from enumeration import ColoringEnumerator, canonical_form, level
+
+# Graphs on n unlabeled vertices, i.e. 2-colorings of K_n up to isomorphism (OEIS A000088)
+GRAPH_COUNTS = [1, 2, 4, 11, 34, 156, 1044]
+
+
+def relabel(adj, perm):
+    # Adjacency bitsets of the same graph with vertex v renamed perm[v]
+    out = [0] * len(adj)
+    for v, row in enumerate(adj):
+        for w in range(len(adj)):
+            if row >> w & 1:
+                out[perm[v]] |= 1 << perm[w]
+    return out
+
+
+@pytest.mark.parametrize("n", range(1, len(GRAPH_COUNTS) + 1))
+def test_class_counts(n):
+    graphs = level(n)
+    assert len(graphs) == GRAPH_COUNTS[n - 1]
+    assert len({cert for _, _, cert in graphs}) == len(graphs)
+
+
+def test_canonical_form_ignores_labels():
+    rng = random.Random(3)
+    for adj, n, cert in level(6):
+        perm = list(range(n))
+        rng.shuffle(perm)
+        assert canonical_form([relabel(adj, perm)], n)[0] == (cert,)
+
+
+def test_pool_matches_serial():
+    enumerator = ColoringEnumerator(6, processes=2)
+    enumerator.wait()
+    assert enumerator.done()
+    assert sorted(cert for cert, _, _ in enumerator.results()) == sorted(
+        cert for _, _, cert in level(6))
+    # Swapping the colors maps the classes with (red, blue) onto (blue, red)
+    table = enumerator.summary()
+    assert sum(table.values()) == 156
+    assert all(table[(blue, red)] == count for (red, blue), count in table.items())
@@ -0,0 +1,86 @@
+from itertools import combinations
+
+import numpy as np
+import pytest
+
+from coloring import ColoringModel, edge_id
+from triangles import TriangleCounter
+
+
+def brute_force(model):
+    # (per color totals, per vertex counts over all colors) from every triple
+    totals = np.zeros(len(model.colors), dtype=np.int64)
+    per_vertex = np.zeros(model.n, dtype=np.int64)
+    for a, b, c in combinations(range(model.n), 3):
+        edges = [edge_id(a, b), edge_id(a, c), edge_id(b, c)]
+        if not all(model.present[k] for k in edges):
+            continue
+        colors = {int(model.color[k]) for k in edges}
+        if len(colors) == 1:
+            totals[colors.pop()] += 1
+            per_vertex[[a, b, c]] += 1
+    return totals, per_vertex
+
+
+def check(counter, model):
+    totals, per_vertex = brute_force(model)
+    assert counter.totals.tolist() == totals.tolist()
+    assert counter.vertex_counts().tolist() == per_vertex.tolist()
+
+
+@pytest.mark.parametrize("n", [0, 1, 2, 3, 7, 12])
+@pytest.mark.parametrize("k", [2, 3])
+def test_sync_complete(n, k):
+    # Two colors take the Goodman shortcut, more colors the general path
+    model = ColoringModel(n, ['r', 'b', 'g'][:k])
+    model.randomize(np.random.default_rng(n))
+    counter = TriangleCounter(k)
+    counter.sync(model)
+    check(counter, model)
+
+
+def test_sync_with_missing_edges():
+    rng = np.random.default_rng(1)
+    model = ColoringModel(10, ['r', 'b'])
+    model.randomize(rng)
+    model.present[rng.random(model.present.size) < 0.3] = 0
+    counter = TriangleCounter(2)
+    counter.sync(model)
+    check(counter, model)
+
+
+@pytest.mark.parametrize("k", [2, 3])
+def test_set_edge_matches_recount(k):
+    # Recolor and remove edges one at a time, checking every step
+    rng = np.random.default_rng(k)
+    n = 9
+    model = ColoringModel(n, ['r', 'b', 'g'][:k])
+    model.randomize(rng)
+    counter = TriangleCounter(k)
+    counter.sync(model)
+    for _ in range(60):
+        u, v = sorted(rng.choice(n, size=2, replace=False).tolist())
+        color = int(rng.integers(-1, k))
+        if color < 0:
+            model.remove_edge(u, v)
+            counter.set_edge(u, v, None)
+        else:
+            model.add_edge(u, v, color)
+            counter.set_edge(u, v, color)
+        check(counter, model)
+
+
+def test_add_vertex():
+    rng = np.random.default_rng(2)
+    model = ColoringModel(6, ['r', 'b'])
+    model.randomize(rng)
+    counter = TriangleCounter(2)
+    counter.sync(model)
+    model.add_vertex()
+    counter.add_vertex()
+    check(counter, model)
+    for u in range(6):
+        color = int(rng.integers(0, 2))
+        model.add_edge(u, 6, color)
+        counter.set_edge(u, 6, color)
+        check(counter, model)
@@ -0,0 +1,69 @@
+import numpy as np
+
+
+class TriangleCounter:
+    # Monochromatic triangle counts per color and per vertex. The full count
+    # uses matrix products: vertex v lies in ((A @ A) * A)[v].sum() / 2
+    # triangles of color class A, and trace(A^3) / 6 of them exist in total.
+    # For a complete 2-coloring only the red product is needed; the blue side
+    # follows from B = J - I - R and Goodman's identity. After that every
+    # recolor is an O(n) update through the common neighbourhood.
+    def __init__(self, num_colors):
+        self.num_colors = num_colors
+        self.n = 0
+        self.adj = [np.zeros((0, 0), dtype=bool) for _ in range(num_colors)]
+        self.per_vertex = np.zeros((num_colors, 0), dtype=np.int64)
+        self.totals = np.zeros(num_colors, dtype=np.int64)
+
+    def sync(self, model):
+        n = self.n = model.n
+        self.adj = list(model.adjacencies())
+        self.per_vertex = np.zeros((self.num_colors, n), dtype=np.int64)
+        complete = model.num_edges() == n * (n - 1) // 2
+        if complete and self.num_colors == 2 and n >= 3:
+            R = self.adj[0].astype(np.float32)
+            P = R @ R
+            d = R.sum(axis=1)
+            self.per_vertex[0] = np.rint((P * R).sum(axis=1) / 2).astype(np.int64)
+            # (J - I - R)^2 = (n-2)J + I + 2R - 1 d^T - d 1^T + R^2
+            Q = P + 2 * R - d[None, :] - d[:, None] + (n - 2)
+            Q[np.diag_indices(n)] += 1
+            B = 1 - R
+            B[np.diag_indices(n)] = 0
+            self.per_vertex[1] = np.rint((Q * B).sum(axis=1) / 2).astype(np.int64)
+            # Goodman: mono triangles = C(n, 3) - 1/2 sum_v d_red(v) d_blue(v)
+            total = n * (n - 1) * (n - 2) // 6 - int(np.dot(d, n - 1 - d)) // 2
+            self.totals[0] = self.per_vertex[0].sum() // 3
+            self.totals[1] = total - self.totals[0]
+        else:
+            for c, A in enumerate(self.adj):
+                A = A.astype(np.float32)
+                self.per_vertex[c] = np.rint(((A @ A) * A).sum(axis=1) / 2).astype(np.int64)
+                self.totals[c] = self.per_vertex[c].sum() // 3
+
+    def add_vertex(self):
+        self.n += 1
+        self.adj = [np.pad(A, ((0, 1), (0, 1))) for A in self.adj]
+        self.per_vertex = np.pad(self.per_vertex, ((0, 0), (0, 1)))
+
+    def set_edge(self, u, v, color):
+        # Recolor edge (u, v); None removes it
+        for c, A in enumerate(self.adj):
+            if A[u, v] and c != color:
+                self.update_through(A, c, u, v, -1)
+                A[u, v] = A[v, u] = False
+        if color is not None and not self.adj[color][u, v]:
+            A = self.adj[color]
+            A[u, v] = A[v, u] = True
+            self.update_through(A, color, u, v, +1)
+
+    def update_through(self, A, c, u, v, sign):
+        # Triangles of color c through edge (u, v) are closed by common neighbours
+        common = np.flatnonzero(A[u] & A[v])
+        self.per_vertex[c, common] += sign
+        self.per_vertex[c, [u, v]] += sign * common.size
+        self.totals[c] += sign * common.size
+
+    def vertex_counts(self):
+        # Monochromatic triangles through each vertex, over all colors
+        return self.per_vertex.sum(axis=0)
@@ -0,0 +1,795 @@
+import matplotlib.pyplot as plt
+from matplotlib.widgets import Button, Slider, RadioButtons
+import numpy as np
+from coloring import ColoringModel, edge_ends
+from renderer import GraphRenderer
+from picking import PickEngine
+from scheduler import FrameScheduler
+from profiler import Profiler
+from analysis import AnalysisWorker
+from cache import ResultCache, witness_key
+from layout import LayoutEngine, LAYOUTS
+from storage import PALETTE, export_text, import_text, load_coloring, save_coloring
+from search import RamseySearch
+from constructions import CirculantSearch
+from enumeration import ColoringEnumerator, coloring_of
+
+MAX_COLORS = 4  # The Colors button cycles through 2..MAX_COLORS edge colors
+COLOR_NAMES = {'r': 'Red', 'b': 'Blue', 'g': 'Green', 'm': 'Magenta', 'c': 'Cyan', 'y': 'Yellow'}
+
+class GraphVisualizer:
+    def __init__(self, save_path='ramsey_coloring.rmc'):
+        # Create figure with a wider layout to accommodate info box
+        self.fig = plt.figure(figsize=(12, 8))
+        
+        # Create left area for info box (left 20% of figure)
+        self.info_ax = self.fig.add_axes([0.02, 0.15, 0.18, 0.83])
+        self.info_ax.axis('off')  # Hide axes for info text area
+        
+        # Create main graph area (right 80% of figure)
+        self.ax = self.fig.add_axes([0.25, 0.15, 0.73, 0.83])
+        
+        # Keep bottom part for controls
+        plt.subplots_adjust(bottom=0.15)
+        
+        self.pos = {}
+        self.num_vertices = 5  # Default number of vertices
+        self.graph_type = "Complete"
+        self.colors = PALETTE[:2]  # Red and blue, plus green and magenta in k-color mode
+        # Edge presence, color index and width (2 normal, 4 bold) per vertex pair
+        self.coloring = ColoringModel(self.num_vertices, self.colors)
+        self.rng = np.random.default_rng()
+        self.selected_vertex = None
+        self.cmd_pressed = False  # Track if command key is pressed
+        self.opt_pressed = False  # Track if option key is pressed
+        self.a_pressed = False    # Track if "a" key is pressed
+        self.dragging_vertex = None  # Track which vertex is being dragged
+        self.clique_sizes = [3, 3]  # Look for red K_s and K_t in every other color, [s, t, ...]
+        # Clique and triangle analysis runs in a worker process, polled by a
+        # timer created once the handlers are instrumented
+        self.analysis = AnalysisWorker()
+        # Vertex placement; layouts other than circular follow structural edits
+        self.layout = LayoutEngine()
+        self.layout_kind = 'circular'
+        self.layout_pending = False  # Color-aware layout waiting for the analysis
+        # Search witnesses found in earlier runs, shared with the batch commands
+        self.cache = ResultCache.from_env()
+        self.cache_shown = set()  # (n, sizes) whose Search press showed the cached witness
+        # "w" saves the coloring here and "i" loads it; .g6 and .json are text
+        self.save_path = save_path
+        self.file_status = ""
+        self.search = None  # Running Ramsey counterexample search, if any
+        self.search_status = ""
+        self.search_timer = None
+        self.search_control = None  # (button, idle label) of the running search
+        self.enumerator = None  # Running enumeration of colorings up to isomorphism
+        self.enum_status = ""
+        self.enum_timer = None
+        self.representatives = []  # (certificate, red clique number, blue clique number)
+        self.rep_index = 0
+        self.enum_n = 0
+        self.enum_table = {}
+        self.enum_time = 0.0
+
+        # Fixed axes setup; the graph artists are kept alive by the renderer
+        self.ax.set_xlim(-1.2, 1.2)
+        self.ax.set_ylim(-1.2, 1.2)
+        self.ax.set_aspect('equal')
+        self.ax.set_xticks([])
+        self.ax.set_yticks([])
+        self.info_text = self.info_ax.text(0.05, 0.95, "", va='top', ha='left',
+                                           fontsize=11, animated=True)
+        # Timing overlay, empty unless profiling is switched on
+        self.hud_text = self.info_ax.text(0.05, 0.0, "", va='bottom', ha='left',
+                                          fontsize=8, family='monospace', animated=True)
+        self.lod_threshold = 10000  # Edges in view above which edges are rasterized
+        self.renderer = GraphRenderer(self.ax, overlays=[self.info_text, self.hud_text],
+                                      lod_threshold=self.lod_threshold)
+        self.picker = PickEngine(cell_size=0.05)  # Fine cells keep edge picks on large graphs cheap
+        # Drag motion and selection changes are drawn by the frame scheduler
+        self.drag_target = None  # Latest cursor position not yet drawn
+        self.frames = FrameScheduler(self.fig.canvas, self.renderer.frame)
+        self.profiler = Profiler.from_env()
+        self.profiler.hud = self.hud_text
+        # Must run before any handler is registered with matplotlib
+        self.instrument()
+        self.analysis_timer = self.fig.canvas.new_timer(interval=50)
+        self.analysis_timer.add_callback(self.poll_analysis)
+
+        # Initialize controls
+        self.setup_controls()
+        self.create_graph()
+        self.draw_graph()
+        
+        # Register event handlers; "l" cycles layouts instead of the log scale,
+        # and the arrow keys step through representatives instead of the
+        # toolbar's view history
+        for keymap, key in (('keymap.yscale', 'l'), ('keymap.back', 'left'),
+                            ('keymap.forward', 'right')):
+            if key in plt.rcParams[keymap]:
+                plt.rcParams[keymap].remove(key)
+        self.fig.canvas.mpl_connect('button_press_event', self.on_click)
+        self.fig.canvas.mpl_connect('button_release_event', self.on_release)
+        self.fig.canvas.mpl_connect('motion_notify_event', self.on_motion)
+        self.fig.canvas.mpl_connect('key_press_event', self.on_key_press)
+        self.fig.canvas.mpl_connect('key_release_event', self.on_key_release)
+        self.fig.canvas.mpl_connect('close_event', self.on_close)
+        
+    def instrument(self):
+        # Route event handlers, render and analysis stages through the profiler
+        timed = self.profiler.wrap
+        for name in ('on_click', 'on_release', 'on_motion', 'on_key_press', 'on_key_release',
+                     'update_num_vertices', 'update_clique_size', 'cycle_colors',
+                     'generate_new_graph',
+                     'clear_graph', 'save_file', 'load_file', 'toggle_search', 'toggle_circulant', 'toggle_enumeration',
+                     'create_graph', 'draw_graph', 'apply_layout', 'request_analysis', 'poll_analysis',
+                     'update_analysis', 'update_info'):
+            timed(self, name)
+        for name in ('sync', 'set_glow', 'set_node_values'):
+            timed(self.renderer, name, 'renderer.' + name)
+        for name in ('blit', 'drag_frame'):
+            timed(self.renderer, name, 'renderer.' + name, frame=True)
+        for name in ('sync', 'nearest_vertex', 'nearest_edge'):
+            timed(self.picker, name, 'picker.' + name)
+        for name in ('submit', 'poll'):
+            timed(self.analysis, name, 'analysis.' + name)
+        for name in ('draw', 'draw_idle'):
+            timed(self.fig.canvas, name, 'canvas.' + name)
+
+    def setup_controls(self):
+        # Vertex count slider
+        vertex_slider_ax = plt.axes([0.2, 0.02, 0.65, 0.03])
+        self.vertex_slider = Slider(
+            ax=vertex_slider_ax,
+            label='Number of Vertices',
+            valmin=3,
+            valmax=2000,  # Large graphs switch to density rendering
+            valinit=self.num_vertices,
+            valstep=1
+        )
+        self.vertex_slider.on_changed(self.update_num_vertices)
+        
+        # Buttons
+        gen_button_ax = plt.axes([0.64, 0.07, 0.12, 0.06])
+        self.gen_button = Button(gen_button_ax, 'Generate Graph')
+        self.gen_button.on_clicked(self.generate_new_graph)
+        
+        circulant_button_ax = plt.axes([0.77, 0.07, 0.1, 0.06])
+        self.circulant_button = Button(circulant_button_ax, 'Circulant')
+        self.circulant_button.on_clicked(self.toggle_circulant)
+        
+        search_button_ax = plt.axes([0.88, 0.07, 0.1, 0.06])
+        self.search_button = Button(search_button_ax, 'Search')
+        self.search_button.on_clicked(self.toggle_search)
+        
+        clear_button_ax = plt.axes([0.02, 0.07, 0.1, 0.06])
+        self.clear_button = Button(clear_button_ax, 'Clear')
+        self.clear_button.on_clicked(self.clear_graph)
+        
+        enum_button_ax = plt.axes([0.13, 0.07, 0.1, 0.06])
+        self.enum_button = Button(enum_button_ax, 'Enumerate')
+        self.enum_button.on_clicked(self.toggle_enumeration)
+        
+        colors_button_ax = plt.axes([0.24, 0.07, 0.1, 0.06])
+        self.colors_button = Button(colors_button_ax, f'Colors: {len(self.colors)}')
+        self.colors_button.on_clicked(self.cycle_colors)
+        
+        # Clique size sliders for the monochromatic K_s / K_t detector and search
+        red_slider_ax = plt.axes([0.47, 0.105, 0.13, 0.025])
+        self.red_slider = Slider(
+            ax=red_slider_ax,
+            label='Red clique size s',
+            valmin=3,
+            valmax=8,
+            valinit=self.clique_sizes[0],
+            valstep=1
+        )
+        self.red_slider.on_changed(self.update_clique_size)
+        
+        blue_slider_ax = plt.axes([0.47, 0.07, 0.13, 0.025])
+        self.blue_slider = Slider(
+            ax=blue_slider_ax,
+            label='Blue clique size t',
+            valmin=3,
+            valmax=8,
+            valinit=self.clique_sizes[1],
+            valstep=1
+        )
+        self.blue_slider.on_changed(self.update_clique_size)
+    
+    def create_graph(self, coloring=None):
+        # `coloring` optionally gives a color index per edge id; otherwise
+        # every edge gets a random color in one vectorized draw
+        self.coloring = ColoringModel(self.num_vertices, self.colors)
+        if coloring is None:
+            self.coloring.randomize(self.rng)
+        else:
+            self.coloring.load(coloring)
+        self.request_analysis()
+        self.apply_layout()
+    
+    def draw_graph(self):
+        # Rebuild the renderer arrays from the graph state; used after
+        # structural changes, while single-edge edits patch the renderer directly
+        self.renderer.sync(self.coloring, self.pos)
+        self.renderer.set_highlight(self.pos[self.selected_vertex]
+                                    if self.selected_vertex is not None else None)
+        self.update_analysis()
+        self.renderer.blit()
+
+    def apply_layout(self):
+        # Place the vertices with the selected layout. The color-aware layout
+        # needs the cliques of the current coloring, so until the analysis
+        # arrives the vertices stay put (new graphs get the force layout).
+        n = self.coloring.n
+        current = np.array([self.pos[i] for i in range(n)]) if len(self.pos) == n else None
+        kind = self.layout_kind
+        clique_edges = ()
+        if kind == 'cliques':
+            self.layout_pending = not self.analysis.fresh()
+            if not self.layout_pending:
+                clique_edges = self.analysis.result[1]["glow"]
+            elif current is not None:
+                kind = None
+            else:
+                kind = 'force'
+        if kind is not None:
+            coords = self.layout.layout(kind, self.coloring, current, clique_edges)
+            self.pos = dict(enumerate(map(tuple, coords.tolist())))
+        self.picker.sync(self.coloring, self.pos)
+
+    def follow_structure(self):
+        # Re-run the layout after an edge or vertex was added or removed; the
+        # circular layout leaves vertices where they are
+        if self.layout_kind == 'circular':
+            return False
+        self.apply_layout()
+        self.draw_graph()
+        return True
+
+    def cycle_layout(self):
+        self.layout_kind = LAYOUTS[(LAYOUTS.index(self.layout_kind) + 1) % len(LAYOUTS)]
+        self.apply_layout()
+        self.draw_graph()
+
+    def request_analysis(self):
+        # Send the edited coloring to the analysis worker; older jobs are dropped
+        self.analysis.submit(self.coloring, self.clique_sizes)
+        self.analysis_timer.start()
+        # Clique membership may have changed
+        self.layout_pending = self.layout_kind == 'cliques'
+
+    def poll_analysis(self):
+        if self.analysis.poll():
+            if self.layout_pending:
+                self.apply_layout()
+                self.draw_graph()
+            else:
+                self.update_analysis()
+                self.renderer.blit()
+        if not self.analysis.busy():
+            self.analysis_timer.stop()
+
+    def update_analysis(self):
+        # Highlight the edges of every monochromatic K_s, shade each vertex by
+        # the monochromatic triangles through it, ring a maximum clique of each
+        # color and refresh the panel. Until
+        # the worker catches up with the latest edit the old results stay up.
+        if self.analysis.fresh():
+            result = self.analysis.result[1]
+            self.renderer.set_glow(result["glow"])
+            self.renderer.set_node_values(result["per_vertex"])
+            if "max_cliques" in result:  # Follows the counts on large graphs
+                self.renderer.set_outline(list(zip(result["max_cliques"], self.colors)))
+        elif len(self.renderer.node_values) != self.coloring.n:
+            self.renderer.set_node_values(np.zeros(self.coloring.n))
+            self.renderer.set_outline([])
+        self.update_info()
+
+    def update_info(self):
+        # Add status information to the left panel
+        info_text = (f"Graph Type: {self.graph_type}\n\n"
+                    f"Layout: {self.layout_kind}\n\n"
+                    f"Vertices: {self.num_vertices}\n\n"
+                    f"Edges: {self.coloring.num_edges()}\n\n"
+                    f"{self.analysis_summary()}\n\n"
+                    f"{self.file_status}"
+                    f"{self.search_status}"
+                    f"{self.enum_status}"
+                    f"Controls:\n"
+                    f"Left-click edge: Change color\n\n"
+                    f"Right-click edge: Toggle bold\n\n"
+                    f"Shift + Left-click: Remove edge\n\n"
+                    f"Command + Left-click vertices: Add edge\n\n"
+                    f"a + Left-click graph: Add vertex\n\n"
+                    f"Option + Left-click vertex: Move Vertex\n\n"
+                    f"l: Cycle layout\n\n"
+                    f"w / i: Save / load coloring\n\n"
+                    f"t: Toggle timing overlay")
+        self.info_text.set_text(info_text)
+
+    def analysis_summary(self, shown=3):
+        if not self.analysis.fresh():
+            return "Mono triangles: computing\u2026\n\nMonochromatic cliques: computing\u2026"
+        result = self.analysis.result[1]
+        hits = result["cache"]["hits"] + self.cache.hits
+        misses = result["cache"]["misses"] + self.cache.misses
+        names = [name.lower() for name in self.color_names()]
+        lines = self.per_color("Mono triangles:", names, result["totals"])
+        if "clique_numbers" in result:
+            # A search that ran out of time only gives a lower bound
+            sizes = [f"{size}" if exact else f"\u2265 {size}"
+                     for size, exact in zip(result["clique_numbers"], result["exact"])]
+            lines += self.per_color("Largest clique (ringed):", names, sizes)
+        else:
+            lines += ["Largest clique: computing\u2026", ""]
+        lines += [f"Cache: {hits} hits, {misses} misses", "", "Monochromatic cliques:"]
+        if result["overflow"]:
+            lines.append(f"More than {result['limit']}, not tracked")
+            return "\n".join(lines)
+        if len(self.colors) > 2:
+            shown = 1  # Keeps the panel short with more colors
+        for color, (name, size) in enumerate(zip(self.color_names(), self.clique_sizes)):
+            total = result["counts"][color]
+            lines.append(f"{name} K_{size}: {total}")
+            for clique in result["examples"][color][:shown]:
+                lines.append("  {" + ", ".join(map(str, clique)) + "}")
+            if total > shown:
+                lines.append("  ...")
+        return "\n".join(lines)
+    
+    def per_color(self, title, names, values):
+        # "title red 1, blue 2", with two colors per line after that
+        items = [f"{name} {value}" for name, value in zip(names, values)]
+        rows = [", ".join(items[i:i + 2]) for i in range(0, len(items), 2)]
+        return [f"{title} {rows[0]}"] + ["  " + row for row in rows[1:]] + [""]
+
+    def on_click(self, event):
+        if event.inaxes != self.ax:
+            return
+
+        # "a" + click: Add new vertex at cursor position
+        if self.a_pressed and event.button == 1:
+            # Create a new vertex with the next available index
+            new_vertex_id = self.coloring.add_vertex()
+            self.pos[new_vertex_id] = (event.xdata, event.ydata)
+            self.picker.add_vertex(self.pos[new_vertex_id])
+            self.request_analysis()
+            self.num_vertices = self.coloring.n
+            # Update the slider value without triggering its callback
+            self.vertex_slider.eventson = False
+            self.vertex_slider.set_val(self.num_vertices)
+            self.vertex_slider.eventson = True
+            if not self.follow_structure():
+                self.draw_graph()
+            return
+
+        # Option-click vertex dragging
+        if self.opt_pressed:
+            node = self.picker.nearest_vertex(event.xdata, event.ydata, 0.2)  # Threshold for selecting vertex
+            if node is not None:
+                self.dragging_vertex = node
+                self.renderer.begin_drag(node)
+                return
+
+        # Command-click vertex selection
+        if self.cmd_pressed:
+            # Find clicked vertex
+            node = self.picker.nearest_vertex(event.xdata, event.ydata, 0.2)  # Increased click radius for better vertex detection
+            if node is not None:
+                if self.selected_vertex is None:
+                    # First vertex selection
+                    self.selected_vertex = node
+                    # Highlight selected vertex
+                    self.frames.request('highlight', self.update_highlight)
+                else:
+                    # Second vertex selection - create edge
+                    edge = tuple(sorted([self.selected_vertex, node]))
+                    self.selected_vertex = None
+                    # Prevent self-loops and duplicate edges
+                    if edge[0] != edge[1] and not self.coloring.has_edge(*edge):
+                        self.coloring.add_edge(*edge, color=0)
+                        self.picker.add_edge(*edge)
+                        self.request_analysis()
+                        if not self.follow_structure():
+                            self.draw_graph()
+                    else:
+                        self.frames.request('highlight', self.update_highlight)
+                return   
+
+        # Find the closest edge to the click point
+        edge = self.picker.nearest_edge(event.xdata, event.ydata, 0.1)  # Threshold for considering a click "on" the edge
+        
+        if edge is not None:
+            u, v = edge_ends(edge)
+            model = self.coloring
+            
+             # Shift-click: Remove edge
+            if event.button == 1 and event.key == 'shift':
+                model.remove_edge(u, v)
+                self.renderer.remove_edge(edge)
+                self.picker.remove_edge(edge)
+                self.request_analysis()
+                if self.follow_structure():
+                    return
+            # Left-click: Change color
+            elif event.button == 1:
+                model.color[edge] = (model.color[edge] + 1) % len(self.colors)
+                self.renderer.set_edge_style(edge, model.color[edge], model.width[edge])
+                self.request_analysis()
+                
+            # Right-click: Toggle bold
+            elif event.button == 3:
+                model.width[edge] = 4 if model.width[edge] <= 2 else 2
+                self.renderer.set_edge_style(edge, model.color[edge], model.width[edge])
+                
+            self.update_analysis()
+            self.renderer.blit()
+    
+    def on_key_press(self, event):
+        if event.key == 'cmd' or event.key == 'control':  # Support both Mac and Windows
+            self.cmd_pressed = True
+        elif event.key == 'alt' or event.key == 'option':  # Support both Mac and Windows
+            self.opt_pressed = True
+        elif event.key == 'a':
+            self.a_pressed = True
+        elif event.key == 'l':
+            self.cycle_layout()
+        elif event.key == 'w':
+            self.save_file()
+        elif event.key == 'i':
+            self.load_file()
+        elif event.key == 't':
+            # Show or hide the timing overlay
+            self.profiler.toggle()
+            self.renderer.blit()
+        elif (event.key in ('left', 'right') and self.representatives
+              and self.coloring.n == self.enum_n):
+            self.step_representative(1 if event.key == 'right' else -1)
+
+    def on_key_release(self, event):
+        if event.key == 'cmd' or event.key == 'control':  # Support both Mac and Windows
+            self.cmd_pressed = False
+            # Only clear selection if we're deselecting command
+            if self.selected_vertex is not None:
+                self.selected_vertex = None
+                self.frames.request('highlight', self.update_highlight)
+        elif event.key == 'alt' or event.key == 'option':  # Support both Mac and Windows
+            self.opt_pressed = False
+            self.end_drag()
+        elif event.key == 'a':
+            self.a_pressed = False
+
+    def on_release(self, event):
+        self.end_drag()
+
+    def on_motion(self, event):
+        if event.inaxes != self.ax:
+            return
+            
+        if self.dragging_vertex is not None and self.opt_pressed:
+            # Only remember where the vertex should go; the next frame moves it
+            self.drag_target = (event.xdata, event.ydata)
+            self.frames.request('drag', self.move_dragged_vertex)
+
+    def move_dragged_vertex(self):
+        node = self.dragging_vertex
+        if node is None or self.drag_target is None:
+            return
+        self.pos[node] = self.drag_target
+        self.drag_target = None
+        self.picker.move_vertex(node, self.pos[node])
+        self.renderer.move_vertex(node, self.pos[node])
+
+    def end_drag(self):
+        if self.dragging_vertex is None:
+            return
+        # Draw the final position before leaving the drag layer
+        self.frames.flush()
+        self.dragging_vertex = None
+        self.renderer.end_drag()
+
+    def update_highlight(self):
+        self.renderer.set_highlight(self.pos[self.selected_vertex]
+                                    if self.selected_vertex is not None else None)
+
+    def update_num_vertices(self, val):
+        new_count = int(val)
+        current_count = self.coloring.n
+        
+        # Only recreate the graph if the slider was directly adjusted
+        if new_count != current_count:
+            self.num_vertices = new_count
+            self.forget_representatives()
+            self.create_graph()
+            self.draw_graph()
+    
+    def update_clique_size(self, val):
+        # Red gets s, every other color t
+        s, t = int(self.red_slider.val), int(self.blue_slider.val)
+        self.clique_sizes = [s] + [t] * (len(self.colors) - 1)
+        self.request_analysis()
+        self.update_analysis()
+        self.renderer.blit()
+
+    def cycle_colors(self, event):
+        # Switch to the next number of edge colors and draw a fresh random
+        # coloring with it
+        k = len(self.colors)
+        self.set_num_colors(k + 1 if k < MAX_COLORS else 2)
+        self.create_graph()
+        self.draw_graph()
+
+    def set_num_colors(self, k):
+        # Searches and enumerations for the old number of colors stop, since
+        # their results would no longer fit the model
+        if k != len(self.colors):
+            if self.search is not None:
+                self.stop_search("Search cancelled")
+            if self.enumerator is not None:
+                self.stop_enumeration()
+            self.forget_representatives()
+        self.colors = PALETTE[:k]
+        self.colors_button.label.set_text(f'Colors: {k}')
+        self.blue_slider.label.set_text('Blue clique size t' if k == 2 else 'Other clique size t')
+        s, t = int(self.red_slider.val), int(self.blue_slider.val)
+        self.clique_sizes = [s] + [t] * (k - 1)
+
+    def color_names(self):
+        return [COLOR_NAMES.get(color, color) for color in self.colors]
+
+    def ramsey_name(self, sizes=None):
+        return "R(" + ",".join(map(str, self.clique_sizes if sizes is None else sizes)) + ")"
+
+    def toggle_search(self, event):
+        # Start a parallel search for a coloring with no red K_s and no blue
+        # K_t on the current number of vertices, or cancel a running one
+        if self.search is not None:
+            self.stop_search("Search cancelled")
+            return
+        # The first press shows a cached witness; later ones search afresh
+        params = (self.num_vertices, tuple(self.clique_sizes))
+        if params not in self.cache_shown and self.load_cached_witness("witness"):
+            self.cache_shown.add(params)
+            return
+        self.start_search(RamseySearch(self.num_vertices, self.clique_sizes), self.search_button,
+                          f"Searching {self.ramsey_name()} > {self.num_vertices}...\n\n")
+
+    def toggle_circulant(self, event):
+        # Same, but only over circulant colorings, which are checked much faster
+        if self.search is not None:
+            self.stop_search("Search cancelled")
+            return
+        if len(self.colors) != 2:
+            self.search_status = "Circulant search needs 2 colors\n\n"
+            self.update_info()
+            self.renderer.blit()
+            return
+        if self.num_vertices > 64:
+            # 2^(n//2) connection sets
+            self.search_status = "Circulant search is limited to n <= 64\n\n"
+            self.update_info()
+            self.renderer.blit()
+            return
+        if self.load_cached_witness("circulant"):
+            return
+        self.start_search(CirculantSearch(self.num_vertices, self.clique_sizes),
+                          self.circulant_button,
+                          f"Searching circulant {self.ramsey_name()} > {self.num_vertices}...\n\n")
+
+    def load_cached_witness(self, kind):
+        # Show a witness (or the knowledge that there is none) found by an
+        # earlier search or batch run instead of searching again
+        entry = self.cache.get(witness_key(kind, self.num_vertices, self.clique_sizes))
+        if entry is None:
+            return False
+        if entry["coloring"] is None:
+            self.search_status = "No circulant witness exists (cached)\n\n"
+            self.update_info()
+            self.renderer.blit()
+            return True
+        message = f"Found {self.ramsey_name()} > {self.num_vertices} witness (cached)"
+        if kind == "witness":
+            message += "\nPress Search again for a new one"
+        if entry.get("connection_set") is not None:
+            message += f"\nS = {{{', '.join(map(str, entry['connection_set']))}}}"
+        self.search_status = message + "\n\n"
+        self.show_coloring(self.num_vertices, entry["coloring"])
+        return True
+
+    def start_search(self, search, button, status):
+        self.search = search
+        self.search_status = status
+        self.search_control = (button, button.label.get_text())
+        button.label.set_text('Stop')
+        self.search_timer = self.fig.canvas.new_timer(interval=200)
+        self.search_timer.add_callback(self.poll_search)
+        self.search_timer.start()
+        self.update_info()
+        self.renderer.blit()
+
+    def poll_search(self):
+        if self.search is None or not self.search.done():
+            return
+        n = self.search.n
+        sizes = list(self.search.sizes)  # The sliders may have moved since it started
+        circulant = isinstance(self.search, CirculantSearch)
+        if self.search.witness is not None:
+            coloring = self.search.witness
+            message = f"Found {self.ramsey_name(sizes)} > {n} witness"
+            entry = {"coloring": np.asarray(coloring, dtype=np.uint8), "connection_set": None}
+            if circulant:
+                message += f"\nS = {{{', '.join(map(str, self.search.connection_set))}}}"
+                entry["connection_set"] = self.search.connection_set
+                self.cache.put(witness_key("circulant", n, sizes), entry)
+            self.cache.put(witness_key("witness", n, sizes), entry)
+        elif circulant:
+            # The circulant search is exhaustive, so "none" is worth keeping
+            coloring = None
+            message = "No circulant witness exists"
+            self.cache.put(witness_key("circulant", n, sizes), {"coloring": None})
+        elif self.search.best is not None:
+            coloring = self.search.best[1]
+            message = f"No witness found, best has {self.search.best[0]} cliques"
+        else:
+            coloring = None
+            message = "No witness found"
+        self.stop_search(message)
+        if coloring is not None:
+            self.show_coloring(n, coloring)
+
+    def stop_search(self, message):
+        self.search.cancel()
+        self.search = None
+        self.search_timer.stop()
+        self.search_timer = None
+        self.search_status = message + "\n\n"
+        button, label = self.search_control
+        button.label.set_text(label)
+        self.update_info()
+        self.fig.canvas.draw_idle()
+    
+    def toggle_enumeration(self, event):
+        # Enumerate every coloring of K_n up to isomorphism, or cancel a
+        # running enumeration
+        if self.enumerator is not None:
+            self.stop_enumeration()
+            self.enum_status = "Enumeration cancelled\n\n"
+        elif len(self.colors) != 2:
+            self.enum_status = "Enumeration needs 2 colors\n\n"
+        elif self.num_vertices > 9:
+            self.enum_status = "Enumeration is limited to n <= 9\n\n"
+        else:
+            self.representatives = []
+            self.enumerator = ColoringEnumerator(self.num_vertices)
+            self.enum_button.label.set_text('Stop')
+            self.enum_timer = self.fig.canvas.new_timer(interval=200)
+            self.enum_timer.add_callback(self.poll_enumeration)
+            self.enum_timer.start()
+            self.poll_enumeration()
+            return
+        self.update_info()
+        self.fig.canvas.draw_idle()
+
+    def poll_enumeration(self):
+        enumerator = self.enumerator
+        if enumerator is None:
+            return
+        if enumerator.done():
+            self.representatives = enumerator.results()
+            self.enum_n = enumerator.n
+            self.enum_table = enumerator.summary()
+            self.enum_time = enumerator.elapsed()
+            self.stop_enumeration()
+            self.rep_index = 0
+            self.show_representative()
+            return
+        self.enum_status = (f"Enumerating K_{enumerator.n}: {len(enumerator.records)} classes\n"
+                            f"{enumerator.finished}/{enumerator.tasks} subtrees, "
+                            f"{enumerator.tested} tested\n"
+                            f"{enumerator.rate():.0f} colorings/s\n\n")
+        self.update_info()
+        self.renderer.blit()
+
+    def stop_enumeration(self):
+        self.enumerator.cancel()
+        self.enumerator = None
+        self.enum_timer.stop()
+        self.enum_timer = None
+        self.enum_button.label.set_text('Enumerate')
+        self.fig.canvas.draw_idle()
+
+    def forget_representatives(self):
+        # The canvas no longer shows an enumerated coloring, so the arrow
+        # keys must not jump back into the old list
+        self.representatives = []
+        self.enum_status = ""
+
+    def step_representative(self, step):
+        self.rep_index = (self.rep_index + step) % len(self.representatives)
+        self.show_representative()
+
+    def show_representative(self):
+        # Load the current canonical representative into the canvas
+        cert, red, blue = self.representatives[self.rep_index]
+        n = self.enum_n
+        cells = [f"({r},{b}): {count}" for (r, b), count in self.enum_table.items()]
+        table = "\n".join("  " + ", ".join(cells[i:i + 3]) for i in range(0, len(cells), 3))
+        self.enum_status = (f"{len(self.representatives)} colorings of K_{n} "
+                            f"in {self.enum_time:.1f}s\n"
+                            f"Class {self.rep_index + 1}/{len(self.representatives)} "
+                            f"(left/right keys)\n"
+                            f"Largest red clique {red}, blue {blue}\n"
+                            f"Classes by (red, blue):\n{table}\n\n")
+        self.show_coloring(n, coloring_of(cert, n))
+
+    def show_coloring(self, n, coloring):
+        # Load a coloring (color index per edge id) of K_n into the canvas
+        self.num_vertices = n
+        self.vertex_slider.eventson = False
+        self.vertex_slider.set_val(n)
+        self.vertex_slider.eventson = True
+        self.create_graph(coloring)
+        self.draw_graph()
+    
+    def save_file(self):
+        # Coloring, bold edges and vertex positions; the format follows the
+        # extension (.rmc binary, .g6 or .json text)
+        try:
+            if self.save_path.endswith('.rmc'):
+                save_coloring(self.save_path, self.coloring, self.pos)
+            else:
+                export_text(self.save_path, self.coloring, self.pos)
+            self.file_status = f"Saved {self.save_path}\n\n"
+        except OSError as error:
+            self.file_status = f"Could not save: {error.strerror}\n\n"
+        self.update_info()
+        self.renderer.blit()
+
+    def load_file(self):
+        try:
+            if self.save_path.endswith('.rmc'):
+                model, pos = load_coloring(self.save_path)
+            else:
+                model, pos = import_text(self.save_path)
+        except (OSError, ValueError) as error:
+            self.file_status = f"Could not load {self.save_path}: {error}\n\n"
+            self.update_info()
+            self.renderer.blit()
+            return
+        self.set_num_colors(len(model.colors))
+        self.colors = list(model.colors)  # Keep the file's colors, not the palette's
+        self.forget_representatives()
+        self.coloring = model
+        self.num_vertices = model.n
+        self.vertex_slider.eventson = False
+        self.vertex_slider.set_val(model.n)
+        self.vertex_slider.eventson = True
+        self.request_analysis()
+        if pos is None:
+            self.apply_layout()
+        else:
+            self.pos = pos
+            self.picker.sync(self.coloring, self.pos)
+        self.file_status = f"Loaded {self.save_path}\n\n"
+        self.draw_graph()
+
+    def generate_new_graph(self, event):
+        self.forget_representatives()
+        self.create_graph()
+        self.draw_graph()
+    
+    def clear_graph(self, event):
+        self.forget_representatives()
+        self.coloring.clear()
+        self.picker.sync(self.coloring, self.pos)
+        self.request_analysis()
+        if not self.follow_structure():
+            self.draw_graph()
+    
+    def on_close(self, event):
+        self.analysis.close()
+        self.profiler.dump()
+
+    def show(self):
+        plt.show()